@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Exact-match on-disk cache for LLM icon classifications.
+
+Keys are the SHA-1 of the (provider, slug, display_name) triple passed to
+aclassify_icon; values are the successful classification dicts as JSON.
+Backed by sqlite3 in WAL mode so re-runs read answers from disk instead of
+re-calling the LLM.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+CACHE_PATH = os.getenv("ENRICH_CACHE_PATH", "output/classify_cache.sqlite3")
+
+def cache_key(provider: str, slug: str, display_name: str) -> str:
+    """Stable key for one classification request"""
+    return hashlib.sha1(f"{provider}|{slug}|{display_name}".encode("utf-8")).hexdigest()
+
+class ClassifyCache:
+    """sqlite-backed key -> classification dict store, safe to call from worker threads"""
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classify (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM classify WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Dict) -> None:
+        """Store a successful classification; failed results must not be cached"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classify (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
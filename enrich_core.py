@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Orchestration glue for icon enrichment: classifier arguments, result dispatch,
+checkpoint serialization and the concurrent EnrichStream worker pool.
+
+Fully annotated and free of async generators so mypyc can compile it ahead of
+time: `mypyc enrich_core.py` builds an enrich_core extension module next to this
+file, which Python imports in preference to the .py. Without a compiled build
+the same code runs as plain Python.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from llm_service_sync import aclassify_icon
+from enrich_cache import ClassifyCache, cache_key
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+# Max LLM calls in flight across all icons
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "32"))
+
+ClassifyArgs = Tuple[str, str, str]
+
+def to_json_line(obj: Dict[str, Any]) -> str:
+    """Serialize one checkpoint record as a single NDJSON line"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode() + "\n"
+    return json.dumps(obj) + "\n"
+
+def classify_args(icon: Dict[str, Any]) -> ClassifyArgs:
+    """(provider, slug, display_name) arguments for aclassify_icon"""
+    return icon.get('provider', ''), icon.get('slug', ''), icon.get('display_name', '')
+
+def process_result(icon: Dict[str, Any], result: Union[Dict[str, Any], BaseException]) -> Dict[str, Any]:
+    """Turn one aclassify_icon outcome (result dict or exception) into a success/failed record"""
+    if isinstance(result, BaseException):
+        return {"icon": icon, "error": str(result), "status": "failed"}
+    if "error" in result:
+        return {"icon": icon, "error": result["error"], "status": "failed"}
+    enriched_icon = icon.copy()
+    enriched_icon.update(result)
+    return {"icon": enriched_icon, "status": "success"}
+
+class EnrichStream:
+    """
+    Process icons concurrently (up to `concurrency` in flight), yielding each record as soon as it completes.
+    `args` holds precomputed classify_args() triples parallel to `batch`.
+    With a `cache`, previously successful classifications are replayed from disk without an LLM call.
+
+    A fixed pool of `concurrency` workers pulls icons from a shared iterator and hands records over
+    a bounded queue, so memory stays O(concurrency) and workers pause when the consumer falls behind.
+    Written as an __aiter__/__anext__ class rather than an async generator, which mypyc cannot compile;
+    a consumer that stops early must call aclose() to cancel the workers.
+    """
+
+    def __init__(
+        self,
+        batch: List[Dict[str, Any]],
+        args: Optional[List[ClassifyArgs]] = None,
+        concurrency: int = ENRICH_CONCURRENCY,
+        cache: Optional[ClassifyCache] = None,
+    ) -> None:
+        if args is None:
+            args = [classify_args(icon) for icon in batch]
+        self.cache = cache
+        self.remaining = min(len(batch), len(args))
+        self._pending: Iterator[Tuple[Dict[str, Any], ClassifyArgs]] = zip(batch, args)
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=concurrency)
+        self._concurrency = concurrency
+        self._workers: List["asyncio.Task[None]"] = []
+
+    def __aiter__(self) -> "EnrichStream":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if self.remaining <= 0:
+            await self.aclose()
+            raise StopAsyncIteration
+        if not self._workers:
+            # Started lazily so the tasks are created on the consumer's running loop
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(min(self._concurrency, self.remaining))
+            ]
+        record = await self._queue.get()
+        self.remaining -= 1
+        return record
+
+    async def aclose(self) -> None:
+        """Cancel any workers still running; don't leave requests running in the background"""
+        for task in self._workers:
+            task.cancel()
+        self.remaining = 0
+
+    async def _one(self, icon: Dict[str, Any], triple: ClassifyArgs) -> Dict[str, Any]:
+        cache = self.cache
+        key = cache_key(*triple) if cache is not None else None
+        if cache is not None and key is not None:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return process_result(icon, cached)
+        result: Union[Dict[str, Any], BaseException]
+        try:
+            result = await aclassify_icon(*triple)
+        except Exception as e:
+            result = e
+        # Only successful classifications are cached; failures are retried next run
+        if cache is not None and key is not None and isinstance(result, dict) and "error" not in result:
+            await asyncio.to_thread(cache.put, key, result)
+        return process_result(icon, result)
+
+    async def _worker(self) -> None:
+        # Workers share one iterator, so each icon is claimed exactly once
+        for icon, triple in self._pending:
+            record: Dict[str, Any]
+            try:
+                record = await self._one(icon, triple)
+            except Exception as e:
+                record = process_result(icon, e)
+            await self._queue.put(record)
+
+def enrich_stream(
+    batch: List[Dict[str, Any]],
+    args: Optional[List[ClassifyArgs]] = None,
+    concurrency: int = ENRICH_CONCURRENCY,
+    cache: Optional[ClassifyCache] = None,
+) -> EnrichStream:
+    """Async iterator of success/failed records for `batch`; see EnrichStream"""
+    return EnrichStream(batch, args, concurrency, cache)
@@ -12,6 +12,7 @@ import (
 	"os"
 	"path/filepath"
 	"regexp"
+	"sort"
 	"strconv"
 	"strings"
 	"time"
@@ -234,6 +235,12 @@ func Generate() error {
 		log.Printf("📝 %s: %d icons", provider, len(icons))
 	}
 
+	// Group the RAG file by provider (stable, so each provider keeps scrape order);
+	// consumers select per-provider slices with a single groupby pass.
+	sort.SliceStable(allIcons, func(i, j int) bool {
+		return allIcons[i].Provider < allIcons[j].Provider
+	})
+
 	ragPath := filepath.Join(outputDir, jsonFile)
 	if err := writeJSON(ragPath, allIcons); err != nil {
 		log.Fatalf("Failed to write RAG JSON: %v", err)
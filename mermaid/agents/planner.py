@@ -2,20 +2,9 @@ import json
 from typing import Dict
 from litellm import completion
 from mermaid.utils.json_helper import robust_json_loads
+from mermaid.utils.llm_session import configure_http_session
 
-class PlannerAgent:
-    """Extracts architectural components and relationships from user input."""
-    
-    def __init__(self, config: Dict):
-        self.config = config
-    
-    def extract_architecture(self, user_input: str) -> Dict:
-        """Use LLM to extract architecture from natural language."""
-        
-        print(f"\n🤖 [PlannerAgent] Starting architecture extraction")
-        print(f"   📝 User input length: {len(user_input)} characters")
-        
-        system_prompt = """You are an expert system architect. Your task is to extract architectural components and their relationships from natural language descriptions.
+_PLANNER_SYSTEM_PROMPT = """You are an expert system architect. Your task is to extract architectural components and their relationships from natural language descriptions.
 
 Generate a JSON IR (Intermediate Representation) with this exact structure:
 {
@@ -57,14 +46,31 @@ Rules:
 
 CRITICAL: If you fail to return ONLY valid JSON, the system will crash. Be extremely precise."""
 
-        user_prompt = f"User Input: {user_input}\n\nGenerate the JSON IR:"
+# User prompt pieces around the per-call payload
+_PLANNER_HEAD = "User Input: "
+_PLANNER_TAIL = "\n\nGenerate the JSON IR:"
+
+class PlannerAgent:
+    """Extracts architectural components and relationships from user input."""
+    
+    def __init__(self, config: Dict):
+        self.config = config
+        configure_http_session()
+    
+    def extract_architecture(self, user_input: str) -> Dict:
+        """Use LLM to extract architecture from natural language."""
+        
+        print(f"\n🤖 [PlannerAgent] Starting architecture extraction")
+        print(f"   📝 User input length: {len(user_input)} characters")
+        
+        user_prompt = "".join((_PLANNER_HEAD, user_input, _PLANNER_TAIL))
 
         print(f"   📤 [PlannerAgent] Sending request to LLM...")
         print(f"   ⚙️  Model: {self.config['model']}")
         print(f"   🌐 Base URL: {self.config['base_url']}")
         
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": _PLANNER_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt}
         ]
 
@@ -1,3 +1,5 @@
+import os
+
 # Configuration
 LITELLM_CONFIG = {
     "base_url": "https://backend.v3.codemateai.dev/v2",
@@ -10,3 +12,29 @@ ICONIFY_API_BASE = "https://api.iconify.design"
 QDRANT_API_BASE = "http://localhost:8001/api/rag"
 DEFAULT_ICON_API = "https://api.iconify.design/carbon:cube.svg"
 DEFAULT_ICON = "https://icons.terrastruct.com/dev%2Famazonwebservices.svg"
+
+class LayerColors(dict):
+    """Layer -> color table; unknown (e.g. LLM-invented) layers read as grey without being stored"""
+    def __missing__(self, layer):
+        return "#999999"
+
+# Layer colors for graph renderers; read-only at render time, so worker threads can share it
+LAYER_COLORS = LayerColors({
+    "presentation": "#5B9BD5",
+    "application": "#9B7FBD",
+    "data": "#70AD47",
+    "infrastructure": "#FFA500"
+})
+
+# (connect, read) timeouts for Qdrant search calls. The read timeout stays generous
+# because the RAG service embeds each query locally before searching.
+QDRANT_TIMEOUT = (3.0, 15.0)
+
+# Set SKIP_LLM_AUDIT=1 (e.g. in CI) to rely on the local structural audit only
+SKIP_LLM_AUDIT = os.getenv("SKIP_LLM_AUDIT", "").lower() in ("1", "true", "yes")
+
+# Persistent technology -> (icon_url, shape_type) cache shared across runs (needs diskcache).
+# Set NO_ICON_CACHE=1 to disable it.
+ICON_CACHE_DIR = os.getenv("ICON_CACHE_DIR", ".icon_cache")
+ICON_CACHE_ENABLED = os.getenv("NO_ICON_CACHE", "").lower() not in ("1", "true", "yes")
+ICON_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days
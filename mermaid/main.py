@@ -1,7 +1,9 @@
-import json
+import logging
 from mermaid.pipeline import DiagramGenerationPipeline
+from mermaid.utils.json_helper import dump_json, dumps_json
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print(f"\n{'#'*80}")
     print(f"#{'ARCHITECTURE DIAGRAM GENERATOR - MODULAR MODE'.center(78)}#")
     print(f"{'#'*80}\n")
@@ -26,13 +28,12 @@ def main():
     print(f"{'─'*80}\n")
     
     result = pipeline.generate(user_request)
-    with open("output_modular.json", "w") as f:
-        json.dump(result, f, indent=2)
+    dump_json(result, "output_modular.json")
     
     print(f"\n{'='*80}")
     print(f"📊 FINAL OUTPUT - JSON IR")
     print(f"{'='*80}")
-    print(json.dumps(result["json_ir"], indent=2))
+    print(dumps_json(result["json_ir"]))
     
     print(f"\n{'='*80}")
     print(f"🎨 FINAL OUTPUT - MERMAID DIAGRAM CODE")
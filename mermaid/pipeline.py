@@ -1,13 +1,21 @@
-from typing import Dict
+import asyncio
+import copy
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 from mermaid.config import LITELLM_CONFIG
 from mermaid.agents.planner import PlannerAgent
 from mermaid.agents.auditor import AuditorAgent
 from mermaid.utils.icon_resolver import IconResolver
 from mermaid.renderers.mermaid_renderer import MermaidRenderer
 from mermaid.renderers.diagramspy import DiagramsPyRenderer
-from mermaid.renderers.drawio import DrawIORenderer
-from mermaid.renderers.d2 import D2Renderer
-from mermaid.renderers.d3 import D3Renderer
+from mermaid.renderers.multi import MultiRenderer
+
+log = logging.getLogger(__name__)
+
+# Number of generate() results kept when result caching is enabled
+RESULT_CACHE_SIZE = 64
 
 class DiagramGenerationPipeline:
     """Main orchestrator for the diagram generation system."""
@@ -18,7 +26,8 @@ class DiagramGenerationPipeline:
         node_padding: int = 20, 
         enable_styling: bool = True,
         diagrams_format: str = "png",
-        output_dir: str = "./diagrams"
+        output_dir: str = "./diagrams",
+        cache_results: bool = False
     ):
         """
         Initialize pipeline with rendering options.
@@ -29,6 +38,7 @@ class DiagramGenerationPipeline:
             enable_styling: Whether to add layer-based color styling (default: True)
             diagrams_format: Output format for Diagrams.py (png, jpg, svg, pdf)
             output_dir: Directory to save Diagrams.py output
+            cache_results: Reuse results for repeated (user_input, max_iterations) requests
         """
         self.planner = PlannerAgent(LITELLM_CONFIG)
         self.auditor = AuditorAgent(LITELLM_CONFIG)
@@ -42,14 +52,56 @@ class DiagramGenerationPipeline:
             output_format=diagrams_format,
             output_dir=output_dir
         )
-        print(f"🏗️  [Pipeline] Initialized with:")
-        print(f"    • Mermaid: icon_size={icon_size}px, styling={'ON' if enable_styling else 'OFF'}")
-        print(f"    • Diagrams.py: format={diagrams_format}, output_dir={output_dir}")
+        # Built once and reused by every generate() call
+        self.renderers = MultiRenderer(self.mermaid_renderer, self.diagrams_renderer)
+        self.cache_results = cache_results
+        self._result_cache: "OrderedDict[Tuple[str, int], Dict]" = OrderedDict()
+        log.info("🏗️  [Pipeline] Initialized with:\n"
+                 "    • Mermaid: icon_size=%spx, styling=%s\n"
+                 "    • Diagrams.py: format=%s, output_dir=%s",
+                 icon_size, "ON" if enable_styling else "OFF", diagrams_format, output_dir)
+    
+    def _resolve_icons(self, nodes: List[Dict]) -> List[Dict]:
+        """Resolve icons on the async path, or the thread-pool path when already inside an event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.icon_resolver.resolve_icons_async(nodes))
+        return self.icon_resolver.resolve_icons(nodes)
+    
+    @staticmethod
+    def _carry_over_icons(prev_nodes: List[Dict], nodes: List[Dict]) -> None:
+        """Copy icon_url/shape_type onto nodes whose id and technology match a previous node."""
+        prev = {
+            node["id"]: node for node in prev_nodes
+            if "id" in node and node.get("icon_url")
+        }
+        carried = 0
+        for node in nodes:
+            old = prev.get(node.get("id"))
+            if old is not None and not node.get("icon_url") and old.get("technology") == node.get("technology"):
+                node["icon_url"] = old["icon_url"]
+                node["shape_type"] = old.get("shape_type")
+                carried += 1
+        log.debug("   ♻️  Reused icons for %d unchanged node(s)", carried)
+    
+    @staticmethod
+    def _drop_invalid_edges(json_ir: Dict) -> None:
+        """Keep only edges that have both 'from' and 'to' and reference known node ids."""
+        edges = json_ir.get("edges", [])
+        node_ids = {node["id"] for node in json_ir.get("nodes", []) if "id" in node}
+        valid = [edge for edge in edges if edge.get("from") in node_ids and edge.get("to") in node_ids]
+        if len(valid) != len(edges):
+            log.warning("⚠️  [Pipeline] Dropped %d edge(s) with a missing or unknown endpoint", len(edges) - len(valid))
+        json_ir["edges"] = valid
     
     def generate(self, user_input: str, max_iterations: int = 0) -> Dict:
         """
         Generate architecture diagram from natural language.
         
+        With cache_results enabled, a repeated (user_input, max_iterations) request
+        returns a copy of the earlier result without calling the LLM again.
+        
         Returns:
             {
                 "json_ir": {...},
@@ -58,108 +110,88 @@ class DiagramGenerationPipeline:
                 "iterations": 1
             }
         """
-        print(f"\n{'='*80}")
-        print(f"🚀 [Pipeline] STARTING DIAGRAM GENERATION PIPELINE")
-        print(f"{'='*80}")
-        print(f"📝 User Input: {user_input[:100]}{'...' if len(user_input) > 100 else ''}")
-        print(f"⚙️  Max Iterations: {max_iterations}")
-        print(f"{'='*80}\n")
+        if not self.cache_results:
+            return self._generate(user_input, max_iterations)
+        
+        key = (hashlib.blake2b(user_input.encode("utf-8"), digest_size=16).hexdigest(), max_iterations)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            log.info("♻️  [Pipeline] Returning cached result for identical request")
+            self._result_cache.move_to_end(key)
+            return copy.deepcopy(cached)
+        
+        result = self._generate(user_input, max_iterations)
+        self._result_cache[key] = copy.deepcopy(result)
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        return result
+    
+    def _generate(self, user_input: str, max_iterations: int) -> Dict:
+        """Run the full planner, icon, auditor and renderer pipeline."""
+        if log.isEnabledFor(logging.INFO):
+            log.info("%s\n🚀 [Pipeline] STARTING DIAGRAM GENERATION PIPELINE\n%s", "=" * 80, "=" * 80)
+            log.info("📝 User Input: %s%s", user_input[:100], "..." if len(user_input) > 100 else "")
+            log.info("⚙️  Max Iterations: %s\n%s", max_iterations, "=" * 80)
         
         # Step 1: Planner extracts architecture
-        print(f"╔════════════════════════════════════════════════════════════════════════════╗")
-        print(f"║ STEP 1: PLANNING - Extracting Architecture from User Input                ║")
-        print(f"╚════════════════════════════════════════════════════════════════════════════╝")
+        log.info("STEP 1: PLANNING - Extracting Architecture from User Input")
         json_ir = self.planner.extract_architecture(user_input)
-        print(f"\n✅ Planning complete! Generated IR with {len(json_ir.get('nodes', []))} nodes\n")
+        log.info("✅ Planning complete! Generated IR with %d nodes", len(json_ir.get("nodes", [])))
         
         # Step 2: Resolve icons
-        print(f"╔════════════════════════════════════════════════════════════════════════════╗")
-        print(f"║ STEP 2: ICON RESOLUTION - Finding Icons for Technologies                  ║")
-        print(f"╚════════════════════════════════════════════════════════════════════════════╝")
-        node_count = len(json_ir.get('nodes', []))
-        print(f"🎨 Resolving icons for {node_count} component(s)...")
-        json_ir["nodes"] = self.icon_resolver.resolve_icons(json_ir.get("nodes", []))
-        print(f"✅ Icon resolution complete!\n")
+        log.info("STEP 2: ICON RESOLUTION - Finding Icons for Technologies")
+        json_ir["nodes"] = self._resolve_icons(json_ir.get("nodes", []))
         
         # Step 3: Auditor reviews (with iteration support)
-        print(f"╔════════════════════════════════════════════════════════════════════════════╗")
-        print(f"║ STEP 3: AUDITING - Reviewing Architecture for Best Practices              ║")
-        print(f"╚════════════════════════════════════════════════════════════════════════════╝")
+        log.info("STEP 3: AUDITING - Reviewing Architecture for Best Practices")
         
         suggestions = []
         iteration = 0
         
         while iteration < max_iterations:
-            print(f"\n{'─'*80}")
-            print(f"🔄 AUDIT ITERATION {iteration + 1}/{max_iterations}")
-            print(f"{'─'*80}")
+            log.info("🔄 AUDIT ITERATION %d/%d", iteration + 1, max_iterations)
             
             is_valid, audit_suggestions, corrected_ir = self.auditor.audit(json_ir)
             
             suggestions.extend(audit_suggestions)
             
-            print(f"\n   📊 Audit Result: {'✅ VALID' if is_valid else '❌ NEEDS CORRECTION'}")
-            print(f"   💡 Suggestions received: {len(audit_suggestions)}")
+            log.info("   📊 Audit Result: %s, %d suggestion(s)",
+                     "✅ VALID" if is_valid else "❌ NEEDS CORRECTION", len(audit_suggestions))
             
             if is_valid or corrected_ir is None:
-                print(f"   ✓ Design approved or no corrections needed")
+                log.debug("   ✓ Design approved or no corrections needed")
                 break
             
-            # Use corrected IR and re-resolve icons
-            print(f"\n   🔄 Applying corrections from auditor...")
-            print(f"   📦 Corrected IR has {len(corrected_ir.get('nodes', []))} nodes")
+            # Use corrected IR; only nodes that are new or changed technology need icons
+            log.debug("   🔄 Applying corrections from auditor (%d nodes)", len(corrected_ir.get("nodes", [])))
+            self._carry_over_icons(json_ir.get("nodes", []), corrected_ir.get("nodes", []))
             json_ir = corrected_ir
-            
-            print(f"   🎨 Re-resolving icons for corrected architecture...")
-            json_ir["nodes"] = self.icon_resolver.resolve_icons(json_ir.get("nodes", []))
+            json_ir["nodes"] = self._resolve_icons(json_ir.get("nodes", []))
             
             iteration += 1
-            print(f"   ✅ Iteration {iteration} complete")
+            log.debug("   ✅ Iteration %d complete", iteration)
         
-        print(f"\n{'─'*80}")
-        print(f"✅ Auditing phase complete after {iteration + 1} iteration(s)")
-        print(f"{'─'*80}\n")
+        log.info("✅ Auditing phase complete after %d iteration(s)", iteration + 1)
         
         # Step 4: Render to Mermaid
-        print(f"╔════════════════════════════════════════════════════════════════════════════╗")
-        print(f"║ STEP 4: RENDERING - Converting to Multiple Diagram Formats                ║")
-        print(f"╚════════════════════════════════════════════════════════════════════════════╝")
-        
-        print(f"\n   📊 [Pipeline] Rendering to Mermaid format...")
-        mermaid_code = self.mermaid_renderer.render(json_ir)
-        
-        print(f"\n   🐍 [Pipeline] Generating Diagrams.py code...")
-        diagrams_code = self.diagrams_renderer.render(json_ir)
- 
-        # Add these new renderers
-        drawio_xml = DrawIORenderer().render(json_ir)
-        d2_code = D2Renderer().render(json_ir)
-        d3_json = D3Renderer().render(json_ir)
+        log.info("STEP 4: RENDERING - Converting to Multiple Diagram Formats")
+        # Renderers expect every edge to have both endpoints, so validate them once here
+        self._drop_invalid_edges(json_ir)
+        outputs = self.renderers.render(json_ir)
         
         result = {
             "json_ir": json_ir,
-            "mermaid": mermaid_code,
-            "diagrams_py": diagrams_code,
-            "drawio_xml": drawio_xml,
-            "d2_code": d2_code,
-            "d3_json": d3_json,
+            **outputs,
             "suggestions": suggestions,
             "iterations": iteration + 1
         }
         
-        print(f"\n{'='*80}")
-        print(f"🎉 [Pipeline] DIAGRAM GENERATION COMPLETE!")
-        print(f"{'='*80}")
-        print(f"📊 Final Statistics:")
-        print(f"   • Nodes: {len(json_ir.get('nodes', []))}")
-        print(f"   • Edges: {len(json_ir.get('edges', []))}")
-        print(f"   • Suggestions: {len(suggestions)}")
-        print(f"   • Total Iterations: {iteration + 1}")
-        print(f"   • Mermaid Output: {len(mermaid_code)} characters")
-        print(f"   • Diagrams.py Code: {len(diagrams_code)} characters")
-        print(f"   • DrawIO XML: {len(drawio_xml)} characters")
-        print(f"   • D2 Code: {len(d2_code)} characters")
-        print(f"   • D3 JSON: {len(d3_json)} characters")
-        print(f"{'='*80}\n")
+        if log.isEnabledFor(logging.INFO):
+            log.info("🎉 [Pipeline] DIAGRAM GENERATION COMPLETE!")
+            log.info("📊 Final Statistics: %d nodes, %d edges, %d suggestions, %d iteration(s)",
+                     len(json_ir.get("nodes", [])), len(json_ir.get("edges", [])), len(suggestions), iteration + 1)
+            log.info("   • Mermaid: %d chars, Diagrams.py: %d chars, DrawIO: %d chars, D2: %d chars, D3: %d links",
+                     len(outputs["mermaid"]), len(outputs["diagrams_py"]), len(outputs["drawio_xml"]),
+                     len(outputs["d2_code"]), len(outputs["d3_json"]["links"]))
         
         return result
@@ -1,5 +1,13 @@
 from typing import Dict
 
+# Layer styling: fill color and container label per IR layer key
+LAYER_CONFIGS = {
+    "presentation": {"color": "#3498db", "label": "User Interface"},
+    "infrastructure": {"color": "#e67e22", "label": "Cloud Infrastructure"},
+    "application": {"color": "#9b59b6", "label": "Microservices"},
+    "data": {"color": "#2ecc71", "label": "Data Layer"}
+}
+
 class D2Renderer:
     """Renders professional diagrams with icons INSIDE the active graph nodes."""
     
@@ -15,15 +23,7 @@ class D2Renderer:
             ''
         ]
 
-        # 2. Layer Styling Configuration
-        layer_configs = {
-            "presentation": {"color": "#3498db", "label": "User Interface"},
-            "infrastructure": {"color": "#e67e22", "label": "Cloud Infrastructure"},
-            "application": {"color": "#9b59b6", "label": "Microservices"},
-            "data": {"color": "#2ecc71", "label": "Data Layer"}
-        }
-
-        # 3. Map nodes to layers and store node-to-layer mapping for connections
+        # 2. Map nodes to layers and store node-to-layer mapping for connections
         layers = {}
         node_to_layer = {}
         for node in nodes:
@@ -31,20 +31,19 @@ class D2Renderer:
             layers.setdefault(layer_name, []).append(node)
             node_to_layer[node["id"]] = layer_name
 
-        # 4. Render Layers and Nodes
+        # 3. Render Layers and Nodes
         # Use a secondary mapping to handle the key names used in the IR vs the ones in our config
         # Some IR might use 'presentation', 'infrastructure', 'application', 'data'
         # Others might use 'application' or 'services'
         
-        # Ensure we cover all layers present in the nodes, even if not in layer_configs
+        # Ensure we cover all layers present in the nodes, even if not in LAYER_CONFIGS
         all_layer_keys = list(layers.keys())
         
         for layer_key in all_layer_keys:
-            config = layer_configs.get(layer_key, {"color": "#9b59b6", "label": layer_key.capitalize()})
+            config = LAYER_CONFIGS.get(layer_key, {"color": "#9b59b6", "label": layer_key.capitalize()})
             
-            d2_lines.append(f'{layer_key}: {config["label"]} {{')
-            d2_lines.append(f'  style: {{fill: "{config["color"]}"; opacity: 0.1; stroke-dash: 3}}')
-            d2_lines.append('')
+            d2_lines.append(f'{layer_key}: {config["label"]} {{\n'
+                            f'  style: {{fill: "{config["color"]}"; opacity: 0.1; stroke-dash: 3}}\n')
             
             for node in layers[layer_key]:
                 node_id = node["id"]
@@ -56,18 +55,14 @@ class D2Renderer:
                 if not shape:
                     shape = "cylinder" if layer_key == "data" else "rectangle"
 
-                d2_lines.append(f'  {node_id}: {label} {{')
-                if shape and shape != "rectangle":
-                    d2_lines.append(f'    shape: {shape}')
-                if icon_url:
-                    d2_lines.append(f'    icon: "{icon_url}"')
-                d2_lines.append(f'  }}')
-            d2_lines.append('}')
-            d2_lines.append('')
+                # One string per node block instead of an append per line
+                shape_line = f'\n    shape: {shape}' if shape != "rectangle" else ''
+                icon_line = f'\n    icon: "{icon_url}"' if icon_url else ''
+                d2_lines.append(f'  {node_id}: {label} {{{shape_line}{icon_line}\n  }}')
+            d2_lines.append('}\n')
 
-        # 5. Render Connections (Edges)
-        d2_lines.append('# --- CONNECTIONS ---')
-        d2_lines.append('')
+        # 4. Render Connections (Edges)
+        d2_lines.append('# --- CONNECTIONS ---\n')
         
         for edge in edges:
             src_id = edge.get("from")
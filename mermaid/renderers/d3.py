@@ -1,12 +1,15 @@
+import logging
 from typing import Dict
-from mermaid.config import DEFAULT_ICON
+from mermaid.config import DEFAULT_ICON, LAYER_COLORS
+
+log = logging.getLogger(__name__)
 
 class D3Renderer:
     """Renders JSON IR to D3.js compatible JSON format for force-directed graph visualization."""
     
     def render(self, json_ir: Dict) -> Dict:
         """Convert JSON IR to D3 force graph JSON format."""
-        print(f"\n🎨 [D3Renderer] Starting D3.js JSON generation")
+        log.info("🎨 [D3Renderer] Starting D3.js JSON generation")
         
         metadata = json_ir.get("diagram_metadata", {})
         nodes = json_ir.get("nodes", [])
@@ -14,64 +17,43 @@ class D3Renderer:
         
         title = metadata.get("title", "Architecture Diagram")
         
-        print(f"   📊 Metadata: {title}")
-        print(f"   📦 Content: {len(nodes)} nodes, {len(edges)} edges")
-        
-        # Layer colors for D3
-        layer_colors = {
-            "presentation": "#5B9BD5",
-            "application": "#9B7FBD",
-            "data": "#70AD47",
-            "infrastructure": "#FFA500"
-        }
+        log.debug("   📊 Metadata: %s", title)
+        log.debug("   📦 Content: %d nodes, %d edges", len(nodes), len(edges))
         
         # Convert nodes to D3 format
-        d3_nodes = []
-        node_id_map = {node["id"]: idx for idx, node in enumerate(nodes)}
+        log.debug("   🔹 [D3Renderer] Processing %d nodes", len(nodes))
         
-        print(f"\n   🔹 [D3Renderer] Processing {len(nodes)} nodes:")
-        
-        for idx, node in enumerate(nodes):
-            layer = node.get("layer", "application")
-            d3_node = {
+        color_of = LAYER_COLORS.__getitem__
+        default_icon = DEFAULT_ICON
+        node_layers = [node.get("layer", "application") for node in nodes]
+        d3_nodes = [
+            {
                 "id": node["id"],
                 "label": node.get("label", "Unknown"),
                 "technology": node.get("technology", ""),
-                "icon": node.get("icon_url", DEFAULT_ICON),
+                "icon": node.get("icon_url", default_icon),
                 "layer": layer,
-                "color": layer_colors.get(layer, "#999999"),
+                "color": color_of(layer),
                 "group": layer,
                 "index": idx
             }
-            d3_nodes.append(d3_node)
-            print(f"      {idx + 1}. {node['id']}: {node.get('label', 'Unknown')}")
-        
-        # Convert edges to D3 format
-        d3_links = []
+            for idx, (node, layer) in enumerate(zip(nodes, node_layers))
+        ]
         
-        print(f"\n   🔗 [D3Renderer] Processing {len(edges)} edges:")
+        # Convert edges to D3 format. Links reference node ids, so the page must use
+        # d3.forceLink().id(d => d.id); edges are validated by the pipeline beforehand.
+        log.debug("   🔗 [D3Renderer] Processing %d edges", len(edges))
         
-        for idx, edge in enumerate(edges, 1):
-            if "from" not in edge or "to" not in edge:
-                print(f"      ⚠️  Edge {idx} missing 'from' or 'to', skipping")
-                continue
-            
-            from_id = edge["from"]
-            to_id = edge["to"]
-            
-            if from_id not in node_id_map or to_id not in node_id_map:
-                print(f"      ⚠️  Edge {idx} references unknown node, skipping")
-                continue
-            
-            d3_link = {
-                "source": node_id_map[from_id],
-                "target": node_id_map[to_id],
+        d3_links = [
+            {
+                "source": edge["from"],
+                "target": edge["to"],
                 "label": edge.get("label", ""),
                 "type": edge.get("type", "unidirectional"),
                 "value": 1
             }
-            d3_links.append(d3_link)
-            print(f"      {idx}. {from_id} -> {to_id}")
+            for edge in edges
+        ]
         
         # Combine into D3 graph format
         d3_graph = {
@@ -81,11 +63,10 @@ class D3Renderer:
             "metadata": {
                 "nodeCount": len(d3_nodes),
                 "linkCount": len(d3_links),
-                "layers": list(set(node.get("layer", "application") for node in nodes))
+                "layers": list(dict.fromkeys(node_layers))
             }
         }
         
-        print(f"\n   ✅ [D3Renderer] D3 JSON generation complete!")
-        print(f"   📏 Generated {len(d3_nodes)} nodes and {len(d3_links)} links")
+        log.info("   ✅ [D3Renderer] Generated %d nodes and %d links", len(d3_nodes), len(d3_links))
         
         return d3_graph
@@ -1,7 +1,10 @@
+import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 from mermaid.config import DEFAULT_ICON
 
+log = logging.getLogger(__name__)
+
 class DiagramsPyRenderer:
     """Renders JSON IR to Diagrams.py Python code using only Custom nodes."""
     
@@ -34,39 +37,33 @@ class DiagramsPyRenderer:
         Returns:
             Python code as string that can be executed to generate diagram
         """
-        print(f"\n🎨 [DiagramsPyRenderer] Starting Diagrams.py code generation")
+        log.info("🎨 [DiagramsPyRenderer] Starting Diagrams.py code generation")
         
         metadata = json_ir.get("diagram_metadata", {})
-        nodes = json_ir.get("nodes", [])
-        edges = json_ir.get("edges", [])
+        nodes: List[Dict] = json_ir.get("nodes", [])
+        edges: List[Dict] = json_ir.get("edges", [])
         
         title = metadata.get("title", "Architecture Diagram")
         direction = metadata.get("direction", "LR")
         
-        print(f"   📊 Metadata:")
-        print(f"      Title: {title}")
-        print(f"      Direction: {direction}")
-        print(f"   📦 Content: {len(nodes)} nodes, {len(edges)} edges")
+        log.debug("   📊 Metadata: title=%s, direction=%s", title, direction)
+        log.debug("   📦 Content: %d nodes, %d edges", len(nodes), len(edges))
         
         # Group nodes by layer
-        layers = {}
+        layers: Dict[str, List[Dict]] = {}
         for node in nodes:
             layer = node.get("layer", "application")
             if layer not in layers:
                 layers[layer] = []
             layers[layer].append(node)
         
-        print(f"   📦 [DiagramsPyRenderer] Grouped nodes into layers")
-        
         # Generate imports (minimal - only need Custom)
         imports = set()
         imports.add("from diagrams import Diagram, Cluster, Edge")
         imports.add("from diagrams.custom import Custom")
         
-        print(f"   📦 [DiagramsPyRenderer] Generated {len(imports)} import statements")
-        
         # Generate Python code
-        code_lines = []
+        code_lines: List[str] = []
         
         # Add imports
         code_lines.extend(sorted(imports))
@@ -87,9 +84,9 @@ class DiagramsPyRenderer:
         code_lines.append(f'with Diagram("{title}", filename="{filename}", direction="{direction}", outformat="{self.output_format}", show=False, graph_attr={graph_attr}):')
         
         # Create node variable mappings
-        node_vars = {}
+        node_vars: Dict[str, str] = {}
         
-        print(f"\n   🔹 [DiagramsPyRenderer] Processing {len(layers)} architectural layers:")
+        log.debug("   🔹 [DiagramsPyRenderer] Processing %d architectural layers:", len(layers))
         
         # Generate clusters for each layer
         for layer_name in ["presentation", "application", "data", "infrastructure"]:
@@ -99,7 +96,7 @@ class DiagramsPyRenderer:
             layer_nodes = layers[layer_name]
             cluster_name = self._get_cluster_name(layer_name)
             
-            print(f"      Layer '{layer_name}': {len(layer_nodes)} nodes")
+            log.debug("      Layer '%s': %d nodes", layer_name, len(layer_nodes))
             
             code_lines.append(f'    with Cluster("{cluster_name}"):')
             
@@ -110,29 +107,25 @@ class DiagramsPyRenderer:
                 
                 # Always use Custom with icon URL
                 code_lines.append(f'        {node_id} = Custom("{label}", "{icon_url}")')
-                
-                print(f"         ✓ {node_id}: Custom(\"{label}\", \"{icon_url}\")")
+                log.debug('         ✓ %s: Custom("%s", "%s")', node_id, label, icon_url)
                 
                 node_vars[node_id] = node_id
         
         code_lines.append("")
         
         # Generate edges
-        print(f"\n   🔗 [DiagramsPyRenderer] Adding {len(edges)} edges:")
+        log.debug("   🔗 [DiagramsPyRenderer] Adding %d edges:", len(edges))
         code_lines.append("    # Define connections")
         
         for idx, edge in enumerate(edges, 1):
-            if "from" not in edge or "to" not in edge:
-                print(f"      ⚠️  Edge {idx} missing 'from' or 'to', skipping")
-                continue
-            
             from_id = edge["from"]
             to_id = edge["to"]
             label = edge.get("label", "")
             edge_type = edge.get("type", "unidirectional")
             
+            # Nodes outside the four clustered layers are not emitted
             if from_id not in node_vars or to_id not in node_vars:
-                print(f"      ⚠️  Edge {idx} references unknown node, skipping")
+                log.warning("      ⚠️  Edge %d references a node outside the rendered layers, skipping", idx)
                 continue
             
             if edge_type == "bidirectional":
@@ -146,12 +139,11 @@ class DiagramsPyRenderer:
                 else:
                     code_lines.append(f'    {from_id} >> {to_id}')
             
-            print(f"      {idx}. {from_id} -> {to_id} ({label if label else 'no label'})")
+            log.debug("      %d. %s -> %s (%s)", idx, from_id, to_id, label or "no label")
         
         result = "\n".join(code_lines)
         
-        print(f"\n   ✅ [DiagramsPyRenderer] Code generation complete!")
-        print(f"   📏 Generated {len(code_lines)} lines of Python code")
-        print(f"   💾 Output will be saved as: {filename}.{self.output_format}")
+        log.info("   ✅ [DiagramsPyRenderer] Generated %d lines of Python code (output: %s.%s)",
+                 len(code_lines), filename, self.output_format)
         
         return result
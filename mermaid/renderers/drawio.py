@@ -1,6 +1,24 @@
+import io
 import math
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, TextIO
+
+# curviness=12 gives modern rounded corners to the lines
+EDGE_STYLE = ("edgeStyle=orthogonalEdgeStyle;rounded=1;curviness=12;html=1;"
+              "strokeColor=#546E7A;strokeWidth=1.5;fontSize=10;fontColor=#37474F;"
+              "endArrow=block;endFill=1;jettySize=auto;orthogonalLoop=1;")
+
+# XML Boilerplate
+_XML_HEADER = "\n".join([
+    '<?xml version="1.0" encoding="UTF-8"?>',
+    '<mxfile host="app.diagrams.net" version="21.0">',
+    '  <diagram name="Cloud Architecture" id="arch_pro">',
+    '    <mxGraphModel dx="2000" dy="1200" grid="1" gridSize="10" guides="1" tooltips="1" connect="1" arrows="1" background="#F8F9FA">',
+    '      <root>',
+    '        <mxCell id="0" />',
+    '        <mxCell id="1" parent="0" />'
+])
+_XML_FOOTER = "\n".join(['', '      </root>', '    </mxGraphModel>', '  </diagram>', '</mxfile>'])
 
 class DrawIORenderer:
     """
@@ -24,11 +42,29 @@ class DrawIORenderer:
         self.default_icon = "https://img.icons8.com/color/96/cloud--v1.png"
 
     def render(self, json_ir: Dict, filename: str = "architecture_output") -> str:
-        nodes = json_ir.get("nodes", [])
-        edges = json_ir.get("edges", [])
+        """Render json_ir to a Draw.io XML string."""
+        buf = io.StringIO()
+        self.render_into(json_ir, buf)
+        return buf.getvalue()
+
+    def render_to_file(self, json_ir: Dict, path: str) -> None:
+        """Render json_ir straight into a .drawio file without building the XML string in memory."""
+        with open(path, "w", encoding="utf-8") as f:
+            self.render_into(json_ir, f)
+
+    def render_into(self, json_ir: Dict, sink: TextIO) -> None:
+        """Write Draw.io XML for json_ir to sink, one cell at a time."""
+        write = sink.write
+
+        def emit(chunk: str) -> None:
+            write("\n")
+            write(chunk)
+
+        nodes: List[Dict] = json_ir.get("nodes", [])
+        edges: List[Dict] = json_ir.get("edges", [])
         
         # 1. Group nodes by layer and define strict vertical order
-        layers = {}
+        layers: Dict[str, List[Dict]] = {}
         layer_order = ["security", "presentation", "infrastructure", "application", "data", "devops"]
         
         for node in nodes:
@@ -47,20 +83,16 @@ class DrawIORenderer:
             "devops": "#455A64"          # Blue-Grey
         }
 
-        # XML Boilerplate
-        xml = [
-            '<?xml version="1.0" encoding="UTF-8"?>',
-            '<mxfile host="app.diagrams.net" version="21.0">',
-            '  <diagram name="Cloud Architecture" id="arch_pro">',
-            '    <mxGraphModel dx="2000" dy="1200" grid="1" gridSize="10" guides="1" tooltips="1" connect="1" arrows="1" background="#F8F9FA">',
-            '      <root>',
-            '        <mxCell id="0" />',
-            '        <mxCell id="1" parent="0" />'
-        ]
-
-        node_map = {}
-        cell_id = 100
-        current_y = 60  # Starting vertical position
+        write(_XML_HEADER)
+
+        node_map: Dict[str, int] = {}
+        cell_id: int = 100
+        current_y: float = 60  # Starting vertical position
+
+        # Loop invariants for the node grid
+        node_w, node_h, max_cols = self.node_w, self.node_h, self.max_cols
+        x_step = node_w + self.x_gap
+        y_step = node_h + self.y_gap
 
         # 3. Process Layers into Grid-based Swimlanes
         for layer_name in layer_order:
@@ -86,21 +118,20 @@ class DrawIORenderer:
             swimlane_style = (f"swimlane;whiteSpace=wrap;html=1;startSize=30;collapsible=0;dashed=1;"
                               f"strokeColor={color};fillColor={color}0D;fontColor={color};fontStyle=1;")
             
-            xml.append(f'        <mxCell id="{z_id}" value="{layer_name.upper()} LAYER" style="{swimlane_style}" vertex="1" parent="1">')
-            xml.append(f'          <mxGeometry x="{zone_x}" y="{current_y}" width="{zone_w}" height="{zone_h}" as="geometry" />')
-            xml.append(f'        </mxCell>')
+            emit(f'        <mxCell id="{z_id}" value="{layer_name.upper()} LAYER" style="{swimlane_style}" vertex="1" parent="1">\n'
+                 f'          <mxGeometry x="{zone_x}" y="{current_y}" width="{zone_w}" height="{zone_h}" as="geometry" />\n'
+                 f'        </mxCell>')
 
             # 4. Add Nodes into the Grid
             for idx, node in enumerate(layer_nodes):
-                r = idx // self.max_cols
-                c = idx % self.max_cols
+                r, c = divmod(idx, max_cols)
                 
                 # Logic to center nodes in partially filled rows
-                nodes_in_this_row = min(self.max_cols, num_nodes - (r * self.max_cols))
-                row_offset = (zone_w - (nodes_in_this_row * (self.node_w + self.x_gap) - self.x_gap)) / 2
+                nodes_in_this_row = min(max_cols, num_nodes - (r * max_cols))
+                row_offset = (zone_w - (nodes_in_this_row * x_step - self.x_gap)) / 2
 
-                nx = row_offset + (c * (self.node_w + self.x_gap))
-                ny = 55 + (r * (self.node_h + self.y_gap))
+                nx = row_offset + (c * x_step)
+                ny = 55 + (r * y_step)
 
                 # Extract SVG URL and generate Label
                 icon = node.get("icon_url", self.default_icon)
@@ -111,9 +142,9 @@ class DrawIORenderer:
                               f"fillColor=#ffffff;strokeColor={color};strokeWidth=2;verticalAlign=bottom;spacingBottom=10;"
                               f"imageAlign=center;imageVerticalAlign=top;spacingTop=45;rounded=1;arcSize=10;glass=0;")
                 
-                xml.append(f'        <mxCell id="{cell_id}" value="{label}" style="{node_style}" vertex="1" parent="{z_id}">')
-                xml.append(f'          <mxGeometry x="{nx}" y="{ny}" width="{self.node_w}" height="{self.node_h}" as="geometry" />')
-                xml.append(f'        </mxCell>')
+                emit(f'        <mxCell id="{cell_id}" value="{label}" style="{node_style}" vertex="1" parent="{z_id}">\n'
+                     f'          <mxGeometry x="{nx}" y="{ny}" width="{node_w}" height="{node_h}" as="geometry" />\n'
+                     f'        </mxCell>')
                 
                 node_map[node["id"]] = cell_id
                 cell_id += 1
@@ -128,22 +159,16 @@ class DrawIORenderer:
             
             if src_id and tgt_id:
                 label = edge.get("label", "")
-                # curviness=12 gives modern rounded corners to the lines
-                edge_style = ("edgeStyle=orthogonalEdgeStyle;rounded=1;curviness=12;html=1;"
-                              "strokeColor=#546E7A;strokeWidth=1.5;fontSize=10;fontColor=#37474F;"
-                              "endArrow=block;endFill=1;jettySize=auto;orthogonalLoop=1;")
-                
-                xml.append(f'        <mxCell id="{cell_id}" value="{label}" style="{edge_style}" edge="1" parent="1" source="{src_id}" target="{tgt_id}">')
-                xml.append(f'          <mxGeometry relative="1" as="geometry"><mxPoint as="offset" /></mxGeometry>')
-                xml.append(f'        </mxCell>')
+                emit(f'        <mxCell id="{cell_id}" value="{label}" style="{EDGE_STYLE}" edge="1" parent="1" source="{src_id}" target="{tgt_id}">\n'
+                     f'          <mxGeometry relative="1" as="geometry"><mxPoint as="offset" /></mxGeometry>\n'
+                     f'        </mxCell>')
                 cell_id += 1
 
         # Close XML
-        xml.extend(['      </root>', '    </mxGraphModel>', '  </diagram>', '</mxfile>'])
-        return "\n".join(xml)
+        write(_XML_FOOTER)
 
 # --- EXAMPLE USAGE ---
 # renderer = DrawIORenderer()
 # xml_output = renderer.render(your_json_ir)
-# with open("diagram.drawio", "w") as f:
-#     f.write(xml_output)
\ No newline at end of file
+# or, without holding the XML in memory:
+# renderer.render_to_file(your_json_ir, "diagram.drawio")
\ No newline at end of file
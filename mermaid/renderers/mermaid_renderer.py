@@ -1,6 +1,12 @@
+import logging
 from typing import Dict, List, Optional
 from mermaid.config import DEFAULT_ICON
 
+log = logging.getLogger(__name__)
+
+# Node line inside a layer subgraph: icon image above the label (htmlLabels)
+_MM_NODE_TMPL = '        {id}["<img src=\'{icon_url}\' width=\'{size}\'/><br/>{label}"]'
+
 class MermaidRenderer:
     """Renders JSON IR to Mermaid v11+ syntax with UI/UX-focused enhancements."""
     
@@ -42,6 +48,14 @@ class MermaidRenderer:
             "security": {"fill": "#ffebee", "stroke": "#c62828", "color": "#c62828", "label": "Security"},
             "operations": {"fill": "#eceff1", "stroke": "#455a64", "color": "#455a64", "label": "Operations"}
         }
+        # Complete "style" values per layer, as (normal, critical path) pairs
+        self._layer_style_strs = {
+            layer: tuple(
+                f"fill:{style['fill']},stroke:{style['stroke']},stroke-width:{width},color:{style['color']}"
+                for width in ("2px", "3px")
+            )
+            for layer, style in self.layer_styles.items()
+        }
     
     def _should_split_diagram(self, nodes: List) -> bool:
         """Determine if diagram should be split for readability."""
@@ -55,9 +69,8 @@ class MermaidRenderer:
         # Count node connections
         node_degrees = {node["id"]: 0 for node in nodes}
         for edge in edges:
-            if "from" in edge and "to" in edge:
-                node_degrees[edge["from"]] = node_degrees.get(edge["from"], 0) + 1
-                node_degrees[edge["to"]] = node_degrees.get(edge["to"], 0) + 1
+            node_degrees[edge["from"]] = node_degrees.get(edge["from"], 0) + 1
+            node_degrees[edge["to"]] = node_degrees.get(edge["to"], 0) + 1
         
         # Top 30% most connected nodes are critical
         sorted_nodes = sorted(node_degrees.items(), key=lambda x: x[1], reverse=True)
@@ -116,24 +129,18 @@ class MermaidRenderer:
         """Create enhanced styling for individual nodes."""
         node_id = node["id"]
         layer = node.get("layer", "application")
-        style = self.layer_styles.get(layer, self.layer_styles["application"])
+        normal, critical = self._layer_style_strs.get(layer) or self._layer_style_strs["application"]
         
         # Emphasize critical path nodes
-        if node_id in critical_nodes:
-            stroke_width = "3px"
-            style_str = f"fill:{style['fill']},stroke:{style['stroke']},stroke-width:{stroke_width},color:{style['color']}"
-        else:
-            stroke_width = "2px"
-            style_str = f"fill:{style['fill']},stroke:{style['stroke']},stroke-width:{stroke_width},color:{style['color']}"
+        style_str = critical if node_id in critical_nodes else normal
         
         return f"    style {node_id} {style_str}"
     
     def render(self, json_ir: Dict) -> str:
         """Convert JSON IR to optimized Mermaid diagram."""
-        print(f"\n[MermaidRenderer] Starting render with UI/UX optimizations")
-        print(f"   - Responsive Mode: {self.responsive_mode}")
-        print(f"   - Legend Enabled: {self.add_legend}")
-        print(f"   - Edge Label Optimization: {self.edge_labels_enabled}")
+        log.info("[MermaidRenderer] Starting render with UI/UX optimizations")
+        log.debug("   - Responsive Mode: %s, Legend Enabled: %s, Edge Label Optimization: %s",
+                  self.responsive_mode, self.add_legend, self.edge_labels_enabled)
         
         metadata = json_ir.get("diagram_metadata", {})
         nodes = json_ir.get("nodes", [])
@@ -144,11 +151,11 @@ class MermaidRenderer:
         
         # Get critical path for emphasis
         critical_nodes = self._get_critical_path_nodes(json_ir)
-        print(f"   * Identified {len(critical_nodes)} critical path components")
+        log.debug("   * Identified %d critical path components", len(critical_nodes))
         
         # Optimize edges
         optimized_edges = self._optimize_edge_labels(edges)
-        print(f"   - Edge optimization: {len(edges)} -> {len(optimized_edges)} (reduced clutter)")
+        log.debug("   - Edge optimization: %d -> %d (reduced clutter)", len(edges), len(optimized_edges))
         
         mermaid_lines = [
             f"---",
@@ -168,30 +175,28 @@ class MermaidRenderer:
                 layers[layer] = []
             layers[layer].append(node)
         
-        print(f"\n   - Processing {len(layers)} layers:")
+        log.debug("   - Processing %d layers", len(layers))
         
         # Add nodes grouped by layer (subgraphs)
+        node_line = _MM_NODE_TMPL.format
+        icon_size = self.icon_size
         for layer_name, layer_nodes in layers.items():
             subgraph_title = self.layer_styles.get(layer_name, {}).get("label", layer_name.title())
             mermaid_lines.append(f"\n    subgraph {layer_name} [ {subgraph_title} ]")
             
             for node in layer_nodes:
-                node_id = node["id"]
-                label = node.get("label", "Unknown")
-                icon_url = node.get("icon_url", DEFAULT_ICON)
-                
-                icon_html = f"<img src='{icon_url}' width='{self.icon_size}'/>"
-                node_definition = f'        {node_id}["{icon_html}<br/>{label}"]'
-                mermaid_lines.append(node_definition)
+                mermaid_lines.append(node_line(
+                    id=node["id"],
+                    icon_url=node.get("icon_url", DEFAULT_ICON),
+                    size=icon_size,
+                    label=node.get("label", "Unknown")
+                ))
             
             mermaid_lines.append("    end")
         
         # Add edges (optimized)
-        print(f"\n   - Adding {len(optimized_edges)} edges:")
+        log.debug("   - Adding %d edges", len(optimized_edges))
         for edge in optimized_edges:
-            if "from" not in edge or "to" not in edge:
-                continue
-            
             from_id = edge["from"]
             to_id = edge["to"]
             label = edge.get("label", "")
@@ -216,9 +221,8 @@ class MermaidRenderer:
         #     mermaid_lines.extend(self._create_legend())
         
         result = "\n".join(mermaid_lines)
-        print(f"\n   [OK] Rendering complete!")
-        print(f"   - Output length: {len(result)} characters")
-        print(f"   - Diagram Stats: {len(nodes)} nodes, {len(optimized_edges)} edges, {len(critical_nodes)} critical")
+        log.info("   [OK] Rendering complete: %d characters, %d nodes, %d edges, %d critical",
+                 len(result), len(nodes), len(optimized_edges), len(critical_nodes))
         
         return result
 
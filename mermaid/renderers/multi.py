@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from mermaid.renderers.mermaid_renderer import MermaidRenderer
+from mermaid.renderers.diagramspy import DiagramsPyRenderer
+from mermaid.renderers.drawio import DrawIORenderer
+from mermaid.renderers.d2 import D2Renderer
+from mermaid.renderers.d3 import D3Renderer
+
+class MultiRenderer:
+    """Renders one JSON IR to every output format using long-lived renderer instances."""
+    
+    def __init__(
+        self,
+        mermaid_renderer: Optional[MermaidRenderer] = None,
+        diagrams_renderer: Optional[DiagramsPyRenderer] = None,
+        drawio_renderer: Optional[DrawIORenderer] = None,
+        d2_renderer: Optional[D2Renderer] = None,
+        d3_renderer: Optional[D3Renderer] = None,
+        parallel: bool = True
+    ):
+        self.mermaid_renderer = mermaid_renderer or MermaidRenderer()
+        self.diagrams_renderer = diagrams_renderer or DiagramsPyRenderer()
+        self.drawio_renderer = drawio_renderer or DrawIORenderer()
+        self.d2_renderer = d2_renderer or D2Renderer()
+        self.d3_renderer = d3_renderer or D3Renderer()
+        self.parallel = parallel
+    
+    def render(self, json_ir: Dict) -> Dict[str, Any]:
+        """
+        Render json_ir to all formats. With parallel set, the other four renderers run
+        on worker threads while Mermaid renders on the calling thread; renderers only
+        read json_ir, so no locking is needed.
+        
+        Returns:
+            Outputs keyed as in the pipeline result: mermaid, diagrams_py, drawio_xml, d2_code, d3_json
+        """
+        if not self.parallel:
+            return {
+                "mermaid": self.mermaid_renderer.render(json_ir),
+                "diagrams_py": self.diagrams_renderer.render(json_ir),
+                "drawio_xml": self.drawio_renderer.render(json_ir),
+                "d2_code": self.d2_renderer.render(json_ir),
+                "d3_json": self.d3_renderer.render(json_ir)
+            }
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = {
+                "diagrams_py": pool.submit(self.diagrams_renderer.render, json_ir),
+                "drawio_xml": pool.submit(self.drawio_renderer.render, json_ir),
+                "d2_code": pool.submit(self.d2_renderer.render, json_ir),
+                "d3_json": pool.submit(self.d3_renderer.render, json_ir)
+            }
+            outputs = {"mermaid": self.mermaid_renderer.render(json_ir)}
+            outputs.update((name, future.result()) for name, future in futures.items())
+        return outputs
@@ -6,6 +6,7 @@ import time
 from functools import lru_cache
 import os
 from pathlib import Path
+from mermaid.config import LAYER_COLORS
 
 # Configuration
 LITELLM_CONFIG = {
@@ -26,6 +27,7 @@ class IconResolver:
     def __init__(self):
         self.cache = {}
         self.static_icons = []
+        self._fallback_pool = []
         self._load_static_index()
 
     def _load_static_index(self):
@@ -40,6 +42,8 @@ class IconResolver:
                 try:
                     with open(path, 'r', encoding='utf-8') as f:
                         self.static_icons = json.load(f)
+                    # Generic image icons make the least surprising random default
+                    self._fallback_pool = [i for i in self.static_icons if i.get("shape_type") == "image"] or self.static_icons
                     print(f"   📂 [IconResolver] Loaded {len(self.static_icons)} icons from {path}")
                     return
                 except Exception as e:
@@ -67,7 +71,7 @@ class IconResolver:
             
             # If no direct match found in static list, use a random one as requested
             print(f"   ⚠️ [IconResolver] No match for '{technology}' in static index. Using random fallback.")
-            random_icon = random.choice(self.static_icons)
+            random_icon = self._fallback_pool[random.randrange(len(self._fallback_pool))]
             icon_url = random_icon.get("url")
             shape_type = random_icon.get("shape_type", "image")
             print(f"   🎲 [IconResolver] Randomly selected: {icon_url} (Shape: {shape_type})")
@@ -735,14 +739,6 @@ class D2Renderer:
             ''
         ]
         
-        # Layer colors for D2
-        layer_colors = {
-            "presentation": "#5B9BD5",
-            "application": "#9B7FBD",
-            "data": "#70AD47",
-            "infrastructure": "#FFA500"
-        }
-        
         # Group nodes by layer
         layers = {}
         layer_order = ["presentation", "application", "data", "infrastructure"]
@@ -761,7 +757,7 @@ class D2Renderer:
                 continue
             
             layer_nodes = layers[layer_name]
-            color = layer_colors.get(layer_name, "#999999")
+            color = LAYER_COLORS[layer_name]
             
             print(f"      Layer '{layer_name}': {len(layer_nodes)} nodes")
             
@@ -845,14 +841,6 @@ class D3Renderer:
         print(f"   📊 Metadata: {title}")
         print(f"   📦 Content: {len(nodes)} nodes, {len(edges)} edges")
         
-        # Layer colors for D3
-        layer_colors = {
-            "presentation": "#5B9BD5",
-            "application": "#9B7FBD",
-            "data": "#70AD47",
-            "infrastructure": "#FFA500"
-        }
-        
         # Convert nodes to D3 format
         d3_nodes = []
         node_id_map = {node["id"]: idx for idx, node in enumerate(nodes)}
@@ -867,7 +855,7 @@ class D3Renderer:
                 "technology": node.get("technology", ""),
                 "icon": node.get("icon_url", DEFAULT_ICON),
                 "layer": layer,
-                "color": layer_colors.get(layer, "#999999"),
+                "color": LAYER_COLORS[layer],
                 "group": layer,
                 "index": idx
             }
@@ -1,10 +1,39 @@
-import json
+import asyncio
+import importlib.util
+import logging
 import requests
-import random
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
-from functools import lru_cache
-from mermaid.config import QDRANT_API_BASE, DEFAULT_ICON
+from mermaid.config import QDRANT_API_BASE, QDRANT_TIMEOUT, DEFAULT_ICON, ICON_CACHE_DIR, ICON_CACHE_ENABLED, ICON_CACHE_TTL
+from mermaid.utils.json_helper import load_json_file
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# HTTP/2 for the async client needs the optional h2 package
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+log = logging.getLogger(__name__)
+
+# Upper bound on concurrent Qdrant lookups from search_icons_batch
+MAX_LOOKUP_WORKERS = 16
+
+# Seconds to stop calling Qdrant after a failed search
+QDRANT_COOLDOWN = 60.0
+
+_TOKEN_SPLIT_RE = re.compile(r"[\s\-_]+")
 
 class IconResolver:
     """Resolves technology names to Iconify icon URLs with caching."""
@@ -12,8 +41,25 @@ class IconResolver:
     def __init__(self):
         self.cache = {}
         self.static_icons = []
+        self._exact_idx: Dict[str, Tuple[str, str]] = {}
+        self._token_idx: Dict[str, List[int]] = {}
+        self._session = self._make_session()
+        self._qdrant_down_until = 0.0
+        self._disk_cache = diskcache.Cache(ICON_CACHE_DIR) if diskcache and ICON_CACHE_ENABLED else None
         self._load_static_index()
 
+    @staticmethod
+    def _make_session() -> requests.Session:
+        """Keep-alive session for Qdrant, pooled to match the lookup workers, with quick retries."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=MAX_LOOKUP_WORKERS,
+            pool_maxsize=MAX_LOOKUP_WORKERS,
+            max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=(502, 503, 504))
+        )
+        session.mount(QDRANT_API_BASE, adapter)
+        return session
+
     def _load_static_index(self):
         """Load static icon index from JSON file."""
         paths_to_try = [
@@ -24,86 +70,201 @@ class IconResolver:
         for path in paths_to_try:
             if os.path.exists(path):
                 try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        self.static_icons = json.load(f)
-                    print(f"   📂 [IconResolver] Loaded {len(self.static_icons)} icons from {path}")
+                    self.static_icons = load_json_file(path)
+                    log.info("   📂 [IconResolver] Loaded %d icons from %s", len(self.static_icons), path)
+                    self._build_static_indexes()
                     return
                 except Exception as e:
-                    print(f"   ⚠️ [IconResolver] Failed to load {path}: {e}")
-        print("   ❌ [IconResolver] Could not find any static icon index file.")
+                    log.warning("   ⚠️ [IconResolver] Failed to load %s: %s", path, e)
+        log.warning("   ❌ [IconResolver] Could not find any static icon index file.")
 
-    @lru_cache(maxsize=500)
-    def search_icon(self, technology: str) -> Tuple[Optional[str], Optional[str]]:
-        """Search for an icon using local static index (primary), then fallback to random static icon."""
-        print(f"\n🔍 [IconResolver] Searching icon for technology: '{technology}'")
-        
-        # 0. Try local static index first
-        # if self.static_icons:
-            # print(f"   📡 [IconResolver] Trying local static lookup for '{technology}'...")
-            # tech_lower = technology.lower()
-            # for icon in self.static_icons:
-            #     # Match by slug, display_name or title
-            #     if tech_lower in icon.get("slug", "").lower() or \
-            #        tech_lower in icon.get("display_name", "").lower() or \
-            #        tech_lower in icon.get("id", "").lower():
-            #         icon_url = icon.get("url")
-            #         shape_type = icon.get("shape_type", "image")
-            #         print(f"   ✅ [IconResolver] Found icon in static index: {icon_url} (Shape: {shape_type})")
-            #         return icon_url, shape_type
-            
-            # # If no direct match found in static list, use a random one as requested
-            # print(f"   ⚠️ [IconResolver] No match for '{technology}' in static index. Using random fallback.")
-            # random_icon = random.choice(self.static_icons)
-            # icon_url = random_icon.get("url")
-            # shape_type = random_icon.get("shape_type", "image")
-            # print(f"   🎲 [IconResolver] Randomly selected: {icon_url} (Shape: {shape_type})")
-            # return icon_url, shape_type
+    def _build_static_indexes(self):
+        """
+        Index static icons by lowercased slug, display name and id for O(1) exact lookups,
+        plus an inverted index from each name token to the positions of icons containing it.
+        """
+        for pos, icon in enumerate(self.static_icons):
+            url = icon.get("url")
+            if not url:
+                continue
+            hit = (url, icon.get("shape_type", "image"))
+            tokens = set()
+            for key in ("slug", "display_name", "id"):
+                value = icon.get(key)
+                if value:
+                    value = value.lower()
+                    self._exact_idx.setdefault(value, hit)
+                    tokens.update(_TOKEN_SPLIT_RE.split(value))
+            tokens.discard("")
+            for token in tokens:
+                self._token_idx.setdefault(token, []).append(pos)
 
-        # if True:
-        #     return DEFAULT_ICON, "image"
+    def _token_lookup(self, tech_lower: str) -> Optional[Tuple[str, str]]:
+        """Return the first static icon whose name tokens include every token of tech_lower."""
+        tokens = {t for t in _TOKEN_SPLIT_RE.split(tech_lower) if t}
+        postings = sorted((self._token_idx.get(t, ()) for t in tokens), key=len)
+        if not postings or not postings[0]:
+            return None
+        candidates = set(postings[0]).intersection(*postings[1:])
+        if not candidates:
+            return None
+        icon = self.static_icons[min(candidates)]
+        return icon["url"], icon.get("shape_type", "image")
 
-        # 1. Fallback to Qdrant search (only if static icons weren't loaded)
-        try:
-            print(f"   📡 [IconResolver] Trying Qdrant search for '{technology}'...")
-            qdrant_url = f"{QDRANT_API_BASE}/search"
-            params = {"q": technology, "top_k": 1}
-            # Increased timeout to 15s to allow for local embedding generation
-            response = requests.get(qdrant_url, params=params, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get("results", [])
-                if results:
-                    hit = results[0]
-                    icon_url = hit.get("url")
-                    shape_type = hit.get("shape_type")
-                    if icon_url:
-                        print(f"   ✅ [IconResolver] Found icon via Qdrant: {icon_url} (Shape: {shape_type})")
-                        return icon_url, shape_type
-            else:
-                print(f"   ❌ [IconResolver] Qdrant search failed with status: {response.status_code}")
-        except Exception as e:
-            print(f"   ❌ [IconResolver] Qdrant search exception: {type(e).__name__}: {e}")
+    def search_icon(self, technology: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Search for an icon: in-process cache, exact match in the static index,
+        the persistent disk cache, then Qdrant, then the default icon.
+        """
+        hit = self._local_lookup(technology)
+        if hit is not None:
+            return hit
+        
+        # 1. Fallback to Qdrant search, unless it failed recently
+        if time.monotonic() < self._qdrant_down_until:
+            log.debug("   ⏭️  [IconResolver] Qdrant marked unavailable, skipping search for '%s'", technology)
+        else:
+            try:
+                log.debug("   📡 [IconResolver] Trying Qdrant search for '%s'...", technology)
+                response = self._session.get(
+                    f"{QDRANT_API_BASE}/search", params={"q": technology, "top_k": 1}, timeout=QDRANT_TIMEOUT
+                )
+                hit = self._qdrant_hit(technology, response)
+                if hit is not None:
+                    return hit
+            except Exception as e:
+                log.warning("   ❌ [IconResolver] Qdrant search exception: %s: %s", type(e).__name__, e)
+                self._trip_qdrant_breaker()
+        
+        return self._fallback(technology)
+    
+    def _local_lookup(self, technology: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Resolve without the network: in-process cache, static index exact match, then disk cache."""
+        cached = self.cache.get(technology)
+        if cached is not None:
+            return cached
+        
+        log.debug("🔍 [IconResolver] Searching icon for technology: '%s'", technology)
+        
+        # 0. Exact match on slug / display name / id in the static index
+        hit = self._exact_idx.get(technology.lower())
+        if hit is not None:
+            log.debug("   ✅ [IconResolver] Found icon in static index: %s (Shape: %s)", hit[0], hit[1])
+            self.cache[technology] = hit
+            return hit
+        
+        if self._disk_cache is not None:
+            hit = self._disk_cache.get(technology)
+            if hit is not None:
+                log.debug("   💾 [IconResolver] Disk cache hit: %s (Shape: %s)", hit[0], hit[1])
+                self.cache[technology] = hit = tuple(hit)
+                return hit
+        return None
+    
+    def _qdrant_hit(self, technology: str, response) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Turn a requests/httpx search response into a remembered hit; trips the breaker on errors."""
+        if response.status_code != 200:
+            log.warning("   ❌ [IconResolver] Qdrant search failed with status: %s", response.status_code)
+            self._trip_qdrant_breaker()
+            return None
+        results = response.json().get("results", [])
+        if results:
+            hit = results[0]
+            icon_url = hit.get("url")
+            shape_type = hit.get("shape_type")
+            if icon_url:
+                log.debug("   ✅ [IconResolver] Found icon via Qdrant: %s (Shape: %s)", icon_url, shape_type)
+                return self._remember(technology, (icon_url, shape_type))
+        return None
+    
+    def _fallback(self, technology: str) -> Tuple[Optional[str], Optional[str]]:
+        """Token match in the static index, else the default icon; cached in-process only."""
+        # 2. Token match against the static index before giving up
+        hit = self._token_lookup(technology.lower())
+        if hit is not None:
+            log.debug("   ✅ [IconResolver] Token match in static index: %s (Shape: %s)", hit[0], hit[1])
+            # Not persisted, so a later run can still get a Qdrant result
+            return self._remember(technology, hit, persist=False)
 
-        print(f"   ❌ [IconResolver] Using absolute default icon for '{technology}'")
-        return DEFAULT_ICON, "image"
+        log.warning("   ❌ [IconResolver] Using absolute default icon for '%s'", technology)
+        # Only cached in-process, so a later run can still find a real icon
+        return self._remember(technology, (DEFAULT_ICON, "image"), persist=False)
+    
+    def _trip_qdrant_breaker(self):
+        """Skip Qdrant for QDRANT_COOLDOWN seconds so the remaining lookups fail fast."""
+        self._qdrant_down_until = time.monotonic() + QDRANT_COOLDOWN
+    
+    def _remember(self, technology: str, result: Tuple[Optional[str], Optional[str]], persist: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Store a resolution in the in-process cache and, if persist is set, the disk cache."""
+        self.cache[technology] = result
+        if persist and self._disk_cache is not None:
+            self._disk_cache.set(technology, result, expire=ICON_CACHE_TTL)
+        return result
+    
+    def search_icons_batch(self, technologies: List[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Resolve several technologies, running the uncached lookups concurrently."""
+        uncached = [tech for tech in technologies if tech not in self.cache]
+        if len(uncached) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_LOOKUP_WORKERS, len(uncached))) as pool:
+                list(pool.map(self.search_icon, uncached))
+        return [self.search_icon(tech) for tech in technologies]
     
     def resolve_icons(self, nodes: List[Dict]) -> List[Dict]:
-        """Resolve icon URLs for all nodes."""
-        print(f"\n🎨 [IconResolver] Starting icon resolution for {len(nodes)} nodes")
-        for idx, node in enumerate(nodes, 1):
-            node_id = node.get("id", f"node_{idx}")
-            print(f"\n   🔹 [IconResolver] Processing node {idx}/{len(nodes)}: '{node_id}'")
-            if "technology" in node and not node.get("icon_url"):
-                tech = node["technology"]
-                print(f"      Technology: '{tech}'")
-                icon_url, shape_type = self.search_icon(tech)
-                node["icon_url"] = icon_url
-                node["shape_type"] = shape_type
-                print(f"      ✅ Resolved to: {icon_url} (Shape: {shape_type})")
-            elif node.get("icon_url"):
-                print(f"      ℹ️  Icon URL already exists: {node['icon_url']}")
-            else:
-                print(f"      ⚠️  No 'technology' field found, skipping icon resolution")
-        print(f"\n✅ [IconResolver] Icon resolution complete!\n")
+        """Resolve icon URLs for all nodes, looking up each distinct technology once."""
+        log.info("🎨 [IconResolver] Starting icon resolution for %d nodes", len(nodes))
+        pending, techs = self._pending(nodes)
+        results = dict(zip(techs, self.search_icons_batch(techs)))
+        return self._apply(nodes, pending, results)
+    
+    async def resolve_icons_async(self, nodes: List[Dict]) -> List[Dict]:
+        """
+        Async variant of resolve_icons: all Qdrant lookups share one httpx.AsyncClient
+        (HTTP/2 multiplexed when h2 is installed). Uses the sync path without httpx.
+        """
+        if httpx is None:
+            return self.resolve_icons(nodes)
+        
+        log.info("🎨 [IconResolver] Starting async icon resolution for %d nodes", len(nodes))
+        pending, techs = self._pending(nodes)
+        remote = [tech for tech in techs if self._local_lookup(tech) is None]
+        if remote:
+            timeout = httpx.Timeout(QDRANT_TIMEOUT[1], connect=QDRANT_TIMEOUT[0])
+            async with httpx.AsyncClient(http2=_HTTP2, timeout=timeout) as client:
+                await asyncio.gather(*(self._search_icon_async(client, tech) for tech in remote))
+        # Every technology is cached in-process by now
+        results = {tech: self.search_icon(tech) for tech in techs}
+        return self._apply(nodes, pending, results)
+    
+    async def _search_icon_async(self, client, technology: str) -> Tuple[Optional[str], Optional[str]]:
+        """Qdrant lookup over the shared async client, falling back like search_icon."""
+        if time.monotonic() >= self._qdrant_down_until:
+            try:
+                log.debug("   📡 [IconResolver] Trying Qdrant search for '%s'...", technology)
+                response = await client.get(f"{QDRANT_API_BASE}/search", params={"q": technology, "top_k": 1})
+                hit = self._qdrant_hit(technology, response)
+                if hit is not None:
+                    return hit
+            except Exception as e:
+                log.warning("   ❌ [IconResolver] Qdrant search exception: %s: %s", type(e).__name__, e)
+                self._trip_qdrant_breaker()
+        return self._fallback(technology)
+    
+    @staticmethod
+    def _pending(nodes: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """Nodes that still need an icon, and their distinct technologies in first-seen order."""
+        pending = [node for node in nodes if "technology" in node and not node.get("icon_url")]
+        techs = list(dict.fromkeys(node["technology"] for node in pending))
+        log.debug("   🔹 [IconResolver] %d node(s) need icons, %d distinct technologies", len(pending), len(techs))
+        return pending, techs
+    
+    @staticmethod
+    def _apply(nodes: List[Dict], pending: List[Dict], results: Dict[str, Tuple[Optional[str], Optional[str]]]) -> List[Dict]:
+        """Write resolved icons onto the pending nodes."""
+        for node in pending:
+            node["icon_url"], node["shape_type"] = results[node["technology"]]
+        
+        skipped = len(nodes) - len(pending)
+        if skipped:
+            log.debug("   ℹ️  Skipped %d node(s) with an existing icon URL or no 'technology' field", skipped)
+        log.info("✅ [IconResolver] Icon resolution complete!")
         return nodes
@@ -1,6 +1,57 @@
 import json
+import mmap
+import os
 import re
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Below this size the mmap syscalls cost more than a plain read()
+MMAP_MIN_BYTES = 64 * 1024
+
+# Patterns used by robust_json_loads, compiled once at import
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r',\s*([\]}])')
+_MD_BLOCK_RE = re.compile(r'```(?:[a-zA-Z]+)?\n?(.*?)\n?```', re.DOTALL)
+_MARKER_RE = re.compile(r'"(?:version|diagram_metadata|nodes)"')
+_DECODER = json.JSONDecoder()
+
+def load_json_file(path: str) -> Any:
+    """
+    Load a JSON file, using orjson over a read-only mmap for large files.
+    Falls back to the stdlib json module when orjson is not installed.
+    """
+    if orjson is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_MIN_BYTES:
+            return orjson.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+def dumps_json(obj: Any, indent: bool = True) -> str:
+    """
+    Serialize to a JSON string (2-space indent by default), using orjson when available.
+    """
+    if orjson is None:
+        return json.dumps(obj, indent=2 if indent else None)
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None).decode()
+
+def dump_json(obj: Any, path: str, indent: bool = True) -> None:
+    """Write obj to path as JSON; orjson bytes go straight to the file without a str round-trip."""
+    if orjson is None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2 if indent else None)
+        return
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None))
 
 def robust_json_loads(content: str) -> Dict:
     """
@@ -10,23 +61,38 @@ def robust_json_loads(content: str) -> Dict:
     if not content:
         return {}
 
-    # 1. Strip <think> blocks if present
-    content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL).strip()
+    # 1. Fast path: well-formed model output is a bare object, so skip the cleanup cascade
+    content = content.strip()
+    # Set when json.loads has already failed on the current `content`
+    parse_failed = False
+    if content.startswith('{'):
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            parse_failed = True
 
-    # 2. Pre-processing: Try to clean common JSON-breaking patterns
+    # 2. Strip <think> blocks if present (substring test first; the regex only runs when needed)
+    if '<think>' in content:
+        stripped = _THINK_RE.sub('', content).strip()
+        if stripped != content:
+            content = stripped
+            parse_failed = False
+
+    # Pre-processing: Try to clean common JSON-breaking patterns
     def clean_json_str(s):
         # Remove trailing commas in objects and arrays
-        s = re.sub(r',\s*([\]}])', r'\1', s)
-        return s
+        return _TRAILING_COMMA_RE.sub(r'\1', s)
 
-    # 3. Try direct parsing first
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
+    # 3. Try direct parsing first, unless the fast path already failed on this exact string
+    if not parse_failed:
         try:
-            return json.loads(clean_json_str(content))
+            return json.loads(content)
         except json.JSONDecodeError:
             pass
+    try:
+        return json.loads(clean_json_str(content))
+    except json.JSONDecodeError:
+        pass
 
     # 4. Detect and extract from markdown code blocks
     if "```json" in content:
@@ -37,7 +103,7 @@ def robust_json_loads(content: str) -> Dict:
             pass
     elif "```" in content:
         try:
-            blocks = re.findall(r'```(?:[a-zA-Z]+)?\n?(.*?)\n?```', content, re.DOTALL)
+            blocks = _MD_BLOCK_RE.findall(content)
             for block in blocks:
                 try:
                     return json.loads(clean_json_str(block.strip()))
@@ -46,65 +112,24 @@ def robust_json_loads(content: str) -> Dict:
         except Exception:
             pass
 
-    # 5. Use raw_decode to handle "Extra data" (text after JSON)
-    # We search for the first '{' and try to decode from there
-    for match in re.finditer(r'\{', content):
-        start_idx = match.start()
-        potential_json = content[start_idx:]
-        try:
-            # raw_decode returns (result, index) where index is where it stopped parsing
-            decoder = json.JSONDecoder()
-            result, end = decoder.raw_decode(potential_json)
-            return result
-        except json.JSONDecodeError:
-            # Try cleaning trailing commas and decode again
-            # This is tricky with raw_decode, so we'll rely on brace matching for cleaned content
-            pass
-
-    # 6. Last resort: Find the largest matching { ... } block
-    # This is helpful if there's text before AND after the JSON
-    try:
-        best_match = ""
-        stack = 0
-        current_start = -1
-        
-        for i, char in enumerate(content):
-            if char == '{':
-                if stack == 0:
-                    current_start = i
-                stack += 1
-            elif char == '}':
-                stack -= 1
-                if stack == 0 and current_start != -1:
-                    candidate = content[current_start:i+1]
-                    # We want the longest valid-looking JSON object
-                    if len(candidate) > len(best_match):
-                        try:
-                            return json.loads(clean_json_str(candidate))
-                        except json.JSONDecodeError:
-                            # If it failed, maybe it's still the best we have, but keep looking
-                            try:
-                                # One more try: just check if it has "nodes" and "edges"
-                                if '"nodes"' in candidate and '"edges"' in candidate:
-                                    # Try to fix truncated JSON if it ends abruptly
-                                    fixed = clean_json_str(candidate)
-                                    # If it's still failing, we can't do much here without more complex logic
-                                    json.loads(fixed)
-                                    best_match = fixed
-                            except json.JSONDecodeError:
-                                pass
-        
-        if best_match:
-            return json.loads(best_match)
-    except Exception:
-        pass
+    # 5. Single left-to-right raw_decode scan, which also handles "Extra data"
+    # (text after JSON). After a failed attempt we resume at the first '{' past
+    # the error position, so no region is re-parsed. If the raw text has no
+    # decodable object, retry once with trailing commas cleaned.
+    for text in (content, clean_json_str(content)):
+        idx = text.find('{')
+        while idx != -1:
+            try:
+                return _DECODER.raw_decode(text, idx)[0]
+            except json.JSONDecodeError as e:
+                idx = text.find('{', max(e.pos, idx + 1))
 
-    # 7. Heavy-duty search for key markers (fallback if brace matching fails)
+    # 6. Heavy-duty search for key markers (fallback if brace matching fails)
     if '"nodes"' in content and '"edges"' in content:
         try:
-            # Find the first { before "version" or "nodes"
-            markers = ['"version"', '"diagram_metadata"', '"nodes"']
-            first_marker_pos = min([content.find(m) for m in markers if content.find(m) != -1] or [len(content)])
+            # Find the first { before "version" or "nodes" (one scan for all markers)
+            marker = _MARKER_RE.search(content)
+            first_marker_pos = marker.start() if marker else len(content)
             start_brace = content.rfind('{', 0, first_marker_pos)
             if start_brace != -1:
                 # Find the last } after the last edge/node
@@ -0,0 +1,17 @@
+import importlib.util
+import httpx
+import litellm
+
+def configure_http_session() -> None:
+    """
+    Install one keep-alive httpx client as litellm's global session, so planner and
+    auditor calls reuse the same TCP/TLS connection. Safe to call more than once.
+    """
+    if litellm.client_session is not None:
+        return
+    litellm.client_session = httpx.Client(
+        # HTTP/2 needs the optional h2 package
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=16)
+    )
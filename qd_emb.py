@@ -1,36 +1,102 @@
 import requests
 import numpy as np
 import json
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct, SparseVectorParams, SparseVector, Prefetch, FusionQuery, Fusion
+from qdrant_client.models import ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, QuantizationSearchParams
+from qdrant_client.models import Filter, FieldCondition, MatchValue, PointVectors
+import mmh3
+import gzip
 import hashlib
+import zlib
 import asyncio
 import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ==================== JSON I/O ====================
+def encode_json(obj) -> bytes:
+    """Compact JSON bytes; orjson serializes floats (and numpy arrays) in C."""
+    if orjson is None:
+        return json.dumps(obj).encode()
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def write_json_file(path: str, obj) -> None:
+    """Write obj as compact JSON."""
+    with open(path, "wb") as f:
+        f.write(encode_json(obj))
+
+def read_json_file(path: str):
+    """Read a JSON file, with orjson when it is installed."""
+    if orjson is None:
+        with open(path, "r") as f:
+            return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
 # ==================== EMBEDDING FUNCTION ====================
+# Keep-alive connection pool for the blocking embedding calls
+_session = requests.Session()
+
+def _decode_response(response):
+    """Decode a requests/httpx JSON response body, with orjson when it is installed."""
+    if orjson is None:
+        return response.json()
+    return orjson.loads(response.content)
+
+def _embedding_array(items: List[Dict]) -> np.ndarray:
+    """Stack item["embedding"] rows into one preallocated float32 array."""
+    first = np.asarray(items[0]["embedding"], dtype=np.float32)
+    out = np.empty((len(items),) + first.shape, dtype=np.float32)
+    out[0] = first
+    for i in range(1, len(items)):
+        out[i] = items[i]["embedding"]
+    return out
+
 def get_embedding_normalized(text: str) -> np.ndarray:
     """Get normalized embedding from llama.cpp"""
     print(f"DEBUG: Requesting embedding for text (len: {len(text)})...")
     try:
-        response = requests.post(
+        response = _session.post(
             "http://localhost:8000/embeddings",
-            json={"input": text},
+            # cache_prompt lets llama.cpp reuse the KV cache for the constant instruction prefix
+            json={"input": text, "cache_prompt": True},
             # timeout=10
         )
         response.raise_for_status()
-        data = response.json()
+        data = _decode_response(response)
         print(f"DEBUG: Received response from embedding server")
     except Exception as e:
         print(f"ERROR: Embedding request failed: {e}")
         raise
-    
+    return _pool_single_response(data)
+
+def _pool_single_response(data) -> np.ndarray:
+    """Mean-pool and normalize a single-text /embeddings response."""
     # Parse response
     if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-        token_embeddings = np.array([item["embedding"] for item in data])
-    elif isinstance(data, dict) and "data" in data:
-        token_embeddings = np.array([item["embedding"] for item in data["data"]])
+        token_embeddings = _embedding_array(data)
+    elif isinstance(data, dict) and data.get("data"):
+        token_embeddings = _embedding_array(data["data"])
     else:
         print(f"ERROR: Unknown response format: {data}")
         raise ValueError("Unknown response format")
@@ -42,13 +108,123 @@ def get_embedding_normalized(text: str) -> np.ndarray:
         token_embeddings = token_embeddings.reshape(-1, token_embeddings.shape[-1])
     
     # Pool: take mean across all tokens
-    pooled = np.mean(token_embeddings, axis=0)
+    pooled = token_embeddings.mean(axis=0)
     
-    # Normalize
-    norm_magnitude = np.linalg.norm(pooled)
-    normalized = pooled / norm_magnitude
+    # Normalize in place; a single dot product is cheaper than linalg.norm's generic path
+    pooled /= np.sqrt(np.dot(pooled, pooled))
     
-    return normalized.tolist()
+    # qdrant-client accepts numpy query vectors; no per-element Python floats needed
+    return pooled
+
+# Keep-alive pool for the async embedding calls, created on first use inside the server's loop
+_async_client = None
+
+def _shared_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(timeout=None)
+    return _async_client
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+async def get_embedding_normalized_async(text: str) -> np.ndarray:
+    """
+    Async get_embedding_normalized over the shared httpx.AsyncClient, so a query embedding
+    never blocks the event loop. Without httpx the blocking call runs on a worker thread.
+    """
+    if httpx is None:
+        return await asyncio.to_thread(get_embedding_normalized, text)
+    print(f"DEBUG: Requesting embedding for text (len: {len(text)})...")
+    try:
+        response = await _shared_async_client().post(
+            "http://localhost:8000/embeddings",
+            json={"input": text, "cache_prompt": True}
+        )
+        response.raise_for_status()
+        data = _decode_response(response)
+        print(f"DEBUG: Received response from embedding server")
+    except Exception as e:
+        print(f"ERROR: Embedding request failed: {e}")
+        raise
+    return _pool_single_response(data)
+
+# Texts per /embeddings request when indexing, and how many requests may be in flight at once
+EMBED_BATCH_SIZE = 32
+EMBED_CONCURRENCY = 8
+EMBEDDING_URL = "http://localhost:8000/embeddings"
+
+def _pool_batch_response(data, count: int) -> np.ndarray:
+    """Turn a batched /embeddings response into a (count, dims) array of unit rows."""
+    items = data["data"] if isinstance(data, dict) and "data" in data else data
+    if not isinstance(items, list) or len(items) != count:
+        print(f"ERROR: Unexpected batch response format: {type(data).__name__}")
+        raise ValueError("Unknown response format")
+    items = sorted(items, key=lambda item: item.get("index", 0))
+    
+    # Each item holds either per-token embeddings (T x D) or one pooled vector (D)
+    pooled = np.stack([
+        emb.mean(axis=0) if emb.ndim == 2 else emb
+        for emb in (np.asarray(item["embedding"], dtype=np.float32) for item in items)
+    ])
+    return (pooled / np.linalg.norm(pooled, axis=1, keepdims=True)).astype(np.float32, copy=False)
+
+def get_embeddings_batch(texts: List[str]) -> np.ndarray:
+    """Embed several texts in one llama.cpp request; returns a float32 (len(texts), dims) array of unit rows."""
+    print(f"DEBUG: Requesting embeddings for a batch of {len(texts)} texts...")
+    try:
+        response = _session.post(EMBEDDING_URL, json={"input": texts, "cache_prompt": True})
+        response.raise_for_status()
+        data = _decode_response(response)
+    except Exception as e:
+        print(f"ERROR: Batch embedding request failed: {e}")
+        raise
+    return _pool_batch_response(data, len(texts))
+
+async def get_embeddings_batch_async(client, texts: List[str]) -> np.ndarray:
+    """Async variant of get_embeddings_batch over a shared httpx.AsyncClient."""
+    print(f"DEBUG: Requesting embeddings for a batch of {len(texts)} texts...")
+    try:
+        response = await client.post(EMBEDDING_URL, json={"input": texts, "cache_prompt": True})
+        response.raise_for_status()
+        data = _decode_response(response)
+    except Exception as e:
+        print(f"ERROR: Batch embedding request failed: {e}")
+        raise
+    return _pool_batch_response(data, len(texts))
+
+async def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts in EMBED_BATCH_SIZE chunks with up to EMBED_CONCURRENCY requests in flight.
+    Without httpx the blocking batches run on a worker thread so the event loop stays free.
+    Returns a float32 (len(texts), dims) array.
+    """
+    batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32)
+    if httpx is None:
+        results = [await asyncio.to_thread(get_embeddings_batch, batch) for batch in batches]
+        return np.concatenate(results)
+    
+    sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+    client = _shared_async_client()
+    async def embed(batch):
+        async with sem:
+            return await get_embeddings_batch_async(client, batch)
+    results = await asyncio.gather(*[embed(batch) for batch in batches])
+    return np.concatenate(results)
+
+# Sparse-vector tokenizer; ASCII \w avoids Unicode class lookups
+_WORD_RE = re.compile(r'\w+', re.ASCII)
+# Stored on every point; sparse vectors indexed under another scheme are rebuilt on startup
+SPARSE_HASH_SCHEME = "mmh3-32"
+
+def _token_index(word: str) -> int:
+    """Map a token to a sparse-vector index (31-bit MurmurHash3)."""
+    return mmh3.hash(word, signed=False) & 0x7fffffff
 
 def get_sparse_embedding(text: str) -> Dict[int, float]:
     """
@@ -56,25 +232,29 @@ def get_sparse_embedding(text: str) -> Dict[int, float]:
     In a real scenario, use a proper sparse model like SPLADE.
     For local testing, we'll use a simple term-frequency map with hashing.
     """
-    import re
-    from collections import Counter
+    # Tokenize and clean; Counter aggregates in C without sorting
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    if not counts:
+        return {}
     
-    # Tokenize and clean
-    words = re.findall(r'\w+', text.lower())
-    counts = Counter(words)
-    total = sum(counts.values())
+    # TF-based weights in one vectorized division (Qdrant stores them as float32 anyway)
+    tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    weights = tf / tf.sum()
     
-    sparse_vec = {}
-    for word, count in counts.items():
-        # Simple hashing for the index
-        index = int(hashlib.md5(word.encode()).hexdigest(), 16) % (2**31 - 1)
-        # TF-based weight
-        weight = count / total
-        sparse_vec[index] = float(weight)
-        
-    return sparse_vec
+    # Hashed token index -> weight
+    return dict(zip(map(_token_index, counts), weights.tolist()))
 
 # ==================== DOCUMENT PREPARATION ====================
+@lru_cache(maxsize=8192)
+def _parse_list_cached(s: str):
+    """Parse a JSON-string tags/aliases field; shared tag lists are only decoded once."""
+    try:
+        value = orjson.loads(s) if orjson is not None else json.loads(s)
+    except Exception:
+        return ()
+    # Tuples keep cached results immutable
+    return tuple(value) if isinstance(value, list) else value
+
 def prepare_search_document(icon: Dict) -> str:
     """Create searchable document from icon metadata"""
     display_name = icon.get("display_name", "")
@@ -86,24 +266,55 @@ def prepare_search_document(icon: Dict) -> str:
     
     # Parse tags if it's a JSON string
     if isinstance(category, str):
-        try:
-            category = json.loads(category)
-        except:
-            category = []
-    category_str = ", ".join(category) if isinstance(category, list) else str(category)
+        category = _parse_list_cached(category)
+    category_str = ", ".join(category) if isinstance(category, (list, tuple)) else str(category)
     
     # Parse aliases if it's a JSON string
     if isinstance(aliases, str):
-        try:
-            aliases = json.loads(aliases)
-        except:
-            aliases = []
-    aliases_str = ", ".join(aliases) if isinstance(aliases, list) else str(aliases)
+        aliases = _parse_list_cached(aliases)
+    aliases_str = ", ".join(aliases) if isinstance(aliases, (list, tuple)) else str(aliases)
     
     # Precise format: {display_name} by {provider}. Category: {tags}. Intent: {technical_intent}. Profile: {semantic_profile}. Aliases: {aliases}.
     search_doc = f"{display_name} by {provider}. Category: [{category_str}]. Intent: {technical_intent}. Profile: {semantic_profile}. Aliases: {aliases_str}."
     return search_doc
 
+# Uploads at least this large build point metadata in worker processes
+PROCESS_POOL_MIN_ICONS = 1000
+METADATA_CHUNK_SIZE = 250
+
+def _build_point_metadata(icon: Dict, search_doc: str) -> Tuple[int, Dict, Dict[int, float]]:
+    """CPU-only part of indexing one icon: (point_id, payload, sparse_dict)."""
+    point_id = int(hashlib.md5(icon["id"].encode()).hexdigest(), 16) % (10 ** 8)
+    payload = {
+        # All icon fields stored as metadata
+        "id": icon.get("id", ""),
+        "slug": icon.get("slug", ""),
+        "display_name": icon.get("display_name", ""),
+        "provider": icon.get("provider", ""),
+        "url": icon.get("url", ""),
+        "iconify_id": icon.get("iconify_id", ""),
+        "semantic_profile": icon.get("semantic_profile", ""),
+        "aliases": icon.get("aliases", ""),
+        "technical_intent": icon.get("technical_intent", ""),
+        "description": icon.get("description", ""),
+        "tags": icon.get("tags", ""),
+        "shape_type": icon.get("shape_type", ""),
+        "default_width": icon.get("default_width", ""),
+        "is_container": icon.get("is_container", ""),
+        "icon_position": icon.get("icon_position", ""),
+        "color_theme": icon.get("color_theme", ""),
+        "popularity": icon.get("popularity", ""),
+        "last_scraped": icon.get("last_scraped", ""),
+        # Helper fields
+        "search_document": search_doc,
+        "sparse_hash": SPARSE_HASH_SCHEME
+    }
+    return point_id, payload, get_sparse_embedding(search_doc)
+
+def _build_points_metadata(items: List[Tuple[Dict, str]]) -> List[Tuple[int, Dict, Dict[int, float]]]:
+    """Build metadata for a chunk of (icon, search_doc) pairs; one executor task per chunk."""
+    return [_build_point_metadata(icon, search_doc) for icon, search_doc in items]
+
 # ==================== QDRANT CLIENT - LOCAL ====================
 class IconRAGPipeline:
     def __init__(self, qdrant_client: AsyncQdrantClient, collection_name: str = "icons", backup_file: str = "icons_backup.json"):
@@ -128,6 +339,10 @@ class IconRAGPipeline:
         self.collection_name = collection_name
         self.vector_size = 2048  # Qwen embedding dimension
         self.backup_file = backup_file
+        # Dense search runs on the int8 copy, then rescores the oversampled candidates at full precision
+        self.dense_search_params = SearchParams(
+            quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+        )
         
     async def create_collection(self):
         """Create Qdrant collection if it doesn't exist"""
@@ -145,6 +360,14 @@ class IconRAGPipeline:
                         distance=Distance.COSINE
                     )
                 },
+                # int8 scalar quantization: 4x less RAM for the 2048-dim vectors
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True
+                    )
+                ),
                 sparse_vectors_config={
                     "text": SparseVectorParams(
                         index=None
@@ -153,7 +376,7 @@ class IconRAGPipeline:
             )
             print(f"✓ Created collection '{self.collection_name}' with named dense and sparse support")
     
-    async def index_icons(self, icons: List[Dict]) -> int:
+    async def index_icons(self, icons: List[Dict], save: bool = True) -> int:
         """
         Index icons into Qdrant (ONE POINT PER ICON).
         
@@ -170,60 +393,43 @@ class IconRAGPipeline:
         """
         points = []
         print(f"DEBUG: Preparing to index {len(icons)} icons...")
-        for idx, icon in enumerate(icons):
-            # ===== STEP 1: Generate EMBEDDING from selected fields only =====
-            search_doc = prepare_search_document(icon)
-            
-            # Add instruction for better embeddings (Instruction-Aware Indexing)
-            indexing_instruction = "Represent this technical infrastructure component for retrieval in architecture diagrams."
-            full_text = f"{indexing_instruction} {search_doc}"
-            
-            # THIS generates the 2048-dim vector
-            print(f"  [{idx+1}/{len(icons)}] Embedding icon: {icon.get('display_name', 'Unknown')}")
-            dense_embedding = get_embedding_normalized(full_text)
-            sparse_dict = get_sparse_embedding(search_doc)
-            sparse_embedding = SparseVector(
-                indices=list(sparse_dict.keys()),
-                values=list(sparse_dict.values())
-            )
-            
-            # ===== STEP 2: Create POINT (icon) with vectors + all metadata =====
-            point_id = int(hashlib.md5(icon["id"].encode()).hexdigest(), 16) % (10 ** 8)
+        # Add instruction for better embeddings (Instruction-Aware Indexing)
+        indexing_instruction = "Represent this technical infrastructure component for retrieval in architecture diagrams."
+        search_docs = [prepare_search_document(icon) for icon in icons]
+        full_texts = [f"{indexing_instruction} {doc}" for doc in search_docs]
+        
+        # Point ids, payloads and sparse vectors are pure CPU work; build them while the embedding
+        # requests are in flight. Large uploads spread the work over processes, small ones use a thread.
+        loop = asyncio.get_running_loop()
+        items = list(zip(icons, search_docs))
+        if len(items) >= PROCESS_POOL_MIN_ICONS:
+            pool, chunk_size = ProcessPoolExecutor(), METADATA_CHUNK_SIZE
+        else:
+            pool, chunk_size = ThreadPoolExecutor(max_workers=1), max(len(items), 1)
+        with pool:
+            metadata_task = asyncio.gather(*[
+                loop.run_in_executor(pool, _build_points_metadata, items[i:i + chunk_size])
+                for i in range(0, len(items), chunk_size)
+            ])
             
-            point = PointStruct(
+            # ===== STEP 1: Generate EMBEDDINGS from selected fields only, batched and concurrent =====
+            dense_matrix = await embed_texts(full_texts)
+            metadata = [entry for chunk in await metadata_task for entry in chunk]
+        
+        # ===== STEP 2: Create POINT (icon) with vectors + all metadata =====
+        # PointStruct validates vectors as lists, so convert the whole float32 matrix once here
+        for (point_id, payload, sparse_dict), dense_embedding in zip(metadata, dense_matrix.tolist()):
+            points.append(PointStruct(
                 id=point_id,
                 vector={
                     "dense": dense_embedding,
-                    "text": sparse_embedding
+                    "text": SparseVector(
+                        indices=list(sparse_dict.keys()),
+                        values=list(sparse_dict.values())
+                    )
                 },
-                payload={
-                    # All icon fields stored as metadata
-                    "id": icon.get("id", ""),
-                    "slug": icon.get("slug", ""),
-                    "display_name": icon.get("display_name", ""),
-                    "provider": icon.get("provider", ""),
-                    "url": icon.get("url", ""),
-                    "iconify_id": icon.get("iconify_id", ""),
-                    "semantic_profile": icon.get("semantic_profile", ""),
-                    "aliases": icon.get("aliases", ""),
-                    "technical_intent": icon.get("technical_intent", ""),
-                    "description": icon.get("description", ""),
-                    "tags": icon.get("tags", ""),
-                    "shape_type": icon.get("shape_type", ""),
-                    "default_width": icon.get("default_width", ""),
-                    "is_container": icon.get("is_container", ""),
-                    "icon_position": icon.get("icon_position", ""),
-                    "color_theme": icon.get("color_theme", ""),
-                    "popularity": icon.get("popularity", ""),
-                    "last_scraped": icon.get("last_scraped", ""),
-                     # Helper field
-                    "search_document": search_doc
-                }
-            )
-            points.append(point)
-            
-            if (idx + 1) % 10 == 0:
-                print(f"  Processed {idx + 1} icons...")
+                payload=payload
+            ))
         
         # ===== STEP 3: Upload to Qdrant in batches =====
         batch_size = 100
@@ -238,8 +444,9 @@ class IconRAGPipeline:
         
         print(f"✓ Indexed {len(points)} icons into collection '{self.collection_name}'")
         
-        # Automatically save to disk after indexing
-        await self.save_to_disk()
+        # Automatically save to disk after indexing (streaming ingest saves once at the end instead)
+        if save:
+            await self.save_to_disk()
         
         return len(points)
     
@@ -248,40 +455,47 @@ class IconRAGPipeline:
         fname = filename or self.backup_file
         print(f"DEBUG: Saving collection '{self.collection_name}' to {fname}...")
         
-        all_points = []
+        # Stream each scrolled page straight to disk; only one page of points is held at a time.
+        # Write to a temp file first so a failed scroll never truncates the existing backup.
+        tmp_name = f"{fname}.tmp"
+        saved = 0
         offset = None
-        while True:
-            response = await self.client.scroll(
-                collection_name=self.collection_name,
-                limit=100,
-                with_vectors=True,
-                with_payload=True,
-                offset=offset
-            )
-            points, next_page_offset = response
-            for p in points:
-                # Convert SparseVector to dict for JSON serialization
-                vectors = p.vector
-                if isinstance(vectors, dict):
-                    if "text" in vectors and hasattr(vectors["text"], "indices"):
-                        vectors["text"] = {
-                            "indices": vectors["text"].indices,
-                            "values": vectors["text"].values
-                        }
+        with open(tmp_name, "wb") as f:
+            f.write(b"[")
+            while True:
+                response = await self.client.scroll(
+                    collection_name=self.collection_name,
+                    limit=100,
+                    with_vectors=True,
+                    with_payload=True,
+                    offset=offset
+                )
+                points, next_page_offset = response
+                for p in points:
+                    # Convert SparseVector to dict for JSON serialization
+                    vectors = p.vector
+                    if isinstance(vectors, dict):
+                        if "text" in vectors and hasattr(vectors["text"], "indices"):
+                            vectors["text"] = {
+                                "indices": vectors["text"].indices,
+                                "values": vectors["text"].values
+                            }
+                    
+                    if saved:
+                        f.write(b",")
+                    f.write(encode_json({
+                        "id": p.id,
+                        "vector": vectors,
+                        "payload": p.payload
+                    }))
+                    saved += 1
                 
-                all_points.append({
-                    "id": p.id,
-                    "vector": vectors,
-                    "payload": p.payload
-                })
-            
-            offset = next_page_offset
-            if offset is None:
-                break
-        
-        with open(fname, "w") as f:
-            json.dump(all_points, f)
-        print(f"✓ Saved {len(all_points)} icons to {fname}")
+                offset = next_page_offset
+                if offset is None:
+                    break
+            f.write(b"]")
+        os.replace(tmp_name, fname)
+        print(f"✓ Saved {saved} icons to {fname}")
 
     async def load_from_disk(self, filename: str = None) -> int:
         """Import points from a JSON file directly into Qdrant"""
@@ -291,14 +505,22 @@ class IconRAGPipeline:
             return 0
         
         print(f"DEBUG: Loading icons from {fname}...")
-        with open(fname, "r") as f:
-            data = json.load(f)
+        data = read_json_file(fname)
         
         points = []
         for item in data:
             # Reconstruct SparseVector if needed
             vectors = item["vector"]
-            if isinstance(vectors, dict) and "text" in vectors and isinstance(vectors["text"], dict):
+            search_doc = item["payload"].get("search_document")
+            if isinstance(vectors, dict) and "text" in vectors and search_doc:
+                # Rebuild from the stored document so the indices match this process's token hash
+                sparse_dict = get_sparse_embedding(search_doc)
+                vectors["text"] = SparseVector(
+                    indices=list(sparse_dict.keys()),
+                    values=list(sparse_dict.values())
+                )
+                item["payload"]["sparse_hash"] = SPARSE_HASH_SCHEME
+            elif isinstance(vectors, dict) and "text" in vectors and isinstance(vectors["text"], dict):
                 vectors["text"] = SparseVector(
                     indices=vectors["text"]["indices"],
                     values=vectors["text"]["values"]
@@ -323,6 +545,47 @@ class IconRAGPipeline:
         print(f"✓ Restored {len(points)} icons from {fname} into '{self.collection_name}'")
         return len(points)
     
+    async def rebuild_sparse_vectors(self) -> int:
+        """Recompute sparse vectors for points indexed under another token hash scheme"""
+        stale = Filter(must_not=[
+            FieldCondition(key="sparse_hash", match=MatchValue(value=SPARSE_HASH_SCHEME))
+        ])
+        count = (await self.client.count(self.collection_name, count_filter=stale, exact=True)).count
+        if not count:
+            return 0
+        
+        print(f"DEBUG: Rebuilding sparse vectors for {count} points indexed with another token hash...")
+        rebuilt = 0
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=stale,
+                limit=100,
+                with_payload=["search_document"],
+                offset=offset
+            )
+            updates = []
+            for p in points:
+                sparse_dict = get_sparse_embedding(p.payload.get("search_document") or "")
+                updates.append(PointVectors(id=p.id, vector={"text": SparseVector(
+                    indices=list(sparse_dict.keys()),
+                    values=list(sparse_dict.values())
+                )}))
+            if updates:
+                await self.client.update_vectors(collection_name=self.collection_name, points=updates)
+                await self.client.set_payload(
+                    collection_name=self.collection_name,
+                    payload={"sparse_hash": SPARSE_HASH_SCHEME},
+                    points=[u.id for u in updates]
+                )
+                rebuilt += len(updates)
+            if offset is None:
+                break
+        
+        print(f"✓ Rebuilt sparse vectors for {rebuilt} points")
+        return rebuilt
+    
     async def search_icons(self, query: str, top_k: int = 5) -> List[Dict]:
         """Search for icons using native hybrid search (Dense + Sparse) + RRF"""
         
@@ -330,7 +593,7 @@ class IconRAGPipeline:
         # Semantic (Dense)
         search_instruction = "Retrieve cloud infrastructure components relevant to architecture diagrams."
         full_query = f"{search_instruction} {query}"
-        dense_query = get_embedding_normalized(full_query)
+        dense_query = await get_embedding_normalized_async(full_query)
         
         # Keyword (Sparse)
         sparse_dict = get_sparse_embedding(query)
@@ -349,6 +612,7 @@ class IconRAGPipeline:
                     Prefetch(
                         query=dense_query,
                         using="dense",
+                        params=self.dense_search_params,
                         limit=20
                     ),
                     Prefetch(
@@ -361,15 +625,7 @@ class IconRAGPipeline:
                 limit=top_k
             )
             
-            results = []
-            for hit in query_response.points:
-                results.append({
-                    **hit.payload,
-                    "score": float(hit.score) if hit.score else 0.0,
-                    "search_type": "hybrid"
-                })
-            
-            return results
+            return self._hits_to_results(query_response.points, "hybrid")
             
         except Exception as e:
             print(f"ERROR: Hybrid search failed: {e}. Falling back to dense search.")
@@ -378,9 +634,21 @@ class IconRAGPipeline:
                 collection_name=self.collection_name,
                 query=dense_query,
                 using="dense",
+                search_params=self.dense_search_params,
                 limit=top_k
             )
-            return [ {**hit.payload, "score": hit.score, "search_type": "dense"} for hit in query_response.points ]
+            return self._hits_to_results(query_response.points, "dense")
+    
+    @staticmethod
+    def _hits_to_results(hits, search_type: str) -> List[Dict]:
+        """Annotate each hit's payload in place; it is a fresh dict per response, so no copy is needed."""
+        results = []
+        for hit in hits:
+            payload = hit.payload
+            payload["score"] = float(hit.score or 0.0)
+            payload["search_type"] = search_type
+            results.append(payload)
+        return results
     
     async def get_collection_stats(self) -> Dict:
         """Get collection statistics"""
@@ -404,10 +672,37 @@ class IconRAGPipeline:
             print(f"✗ Error deleting collection: {e}")
 
 # ==================== FASTAPI SERVER ====================
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
 
+class DecompressingRequest(Request):
+    """Request whose body is transparently decoded from gzip/zstd Content-Encoding"""
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encoding = self.headers.get("content-encoding", "").lower()
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            elif encoding == "zstd":
+                if zstandard is None:
+                    raise HTTPException(status_code=415, detail="zstd request bodies need the zstandard package")
+                body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+            self._body = body
+        return self._body
+
+class DecompressingRoute(APIRoute):
+    def get_route_handler(self):
+        original_handler = super().get_route_handler()
+        
+        async def handler(request: Request):
+            return await original_handler(DecompressingRequest(request.scope, request.receive))
+        
+        return handler
+
 app = FastAPI(title="Icon RAG API (Local Qdrant)")
+# Compressed uploads (see upload_script.py) are decoded before FastAPI parses the JSON body
+app.router.route_class = DecompressingRoute
 
 rag = None
 
@@ -460,6 +755,71 @@ async def upload_icons(data: IconData):
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=str(e))
 
+# Icons indexed per step while an NDJSON upload is still arriving
+NDJSON_INGEST_BATCH = 256
+
+def _stream_decompressor(encoding: str):
+    """Incremental decoder for a streamed request body's Content-Encoding"""
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+    if encoding == "zstd":
+        if zstandard is None:
+            raise HTTPException(status_code=415, detail="zstd request bodies need the zstandard package")
+        decompressobj = zstandard.ZstdDecompressor().decompressobj()
+        # request.stream() ends with an empty chunk, which a finished zstd decompressobj rejects
+        return lambda chunk: decompressobj.decompress(chunk) if chunk else b""
+    return lambda chunk: chunk
+
+@app.post("/api/rag/upload/ndjson")
+async def upload_icons_ndjson(request: Request):
+    """
+    Upload icons as newline-delimited JSON (one icon object per line).
+    
+    POST /api/rag/upload/ndjson
+    Content-Type: application/x-ndjson
+    
+    The body is parsed as it arrives and indexed NDJSON_INGEST_BATCH icons at a time,
+    so neither side has to hold the whole upload. The backup is written once at the end.
+    """
+    try:
+        if not rag:
+            raise HTTPException(status_code=500, detail="RAG pipeline not initialized")
+        
+        await rag.create_collection()
+        decompress = _stream_decompressor(request.headers.get("content-encoding", "").lower())
+        loads = orjson.loads if orjson is not None else json.loads
+        
+        count = 0
+        pending = b""
+        batch = []
+        async for chunk in request.stream():
+            lines = (pending + decompress(chunk)).split(b"\n")
+            # The last piece may be an incomplete line; keep it for the next chunk
+            pending = lines.pop()
+            batch.extend(loads(line) for line in lines if line.strip())
+            if len(batch) >= NDJSON_INGEST_BATCH:
+                count += await rag.index_icons(batch, save=False)
+                batch = []
+        if pending.strip():
+            batch.append(loads(pending))
+        if batch:
+            count += await rag.index_icons(batch, save=False)
+        
+        if count:
+            await rag.save_to_disk()
+        return {
+            "status": "success",
+            "message": f"Indexed {count} icons into local Qdrant",
+            "count": count
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        print(f"ERROR in upload_icons_ndjson: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/rag/search")
 async def search_icons(q: str, top_k: int = 5):
     """
@@ -475,8 +835,7 @@ async def search_icons(q: str, top_k: int = 5):
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
         results = await rag.search_icons(q, top_k=top_k)
-        with open("rag_search_results.json", "w") as f:
-            json.dump(results, f)
+        write_json_file("rag_search_results.json", results)
         return {
             "status": "success",
             "query": q,
@@ -550,12 +909,19 @@ async def startup():
             else:
                 print("DEBUG: No backup file found. Ready for new indexing.")
         else:
+            # Queries hash tokens with SPARSE_HASH_SCHEME; bring older points in line first
+            await rag.rebuild_sparse_vectors()
             print(f"✓ Collection contains {collection_info.points_count} points. Ready.")
     except Exception as e:
         print(f"WARNING: Startup check failed: {e}")
         # Collection might not exist yet, which is fine for first run
     print("✓ RAG pipeline initialized with local Qdrant")
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the pooled embedding connections"""
+    await close_async_client()
+
 # ==================== USAGE EXAMPLE ====================
 if __name__ == "__main__":
     import uvicorn
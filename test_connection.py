@@ -19,7 +19,8 @@ def test_connectivity():
     
     try:
         start_time = time.time()
-        response = requests.post(url, headers=headers, json=payload, timeout=20)
+        with requests.Session() as session:
+            response = session.post(url, headers=headers, json=payload, timeout=20)
         duration = time.time() - start_time
         
         print(f"Status Code: {response.status_code}")
@@ -3,38 +3,69 @@ import json
 import asyncio
 import os
 import sys
-from typing import List, Dict
-from llm_service_sync import aclassify_icon
+from typing import List, Dict, Tuple
+from enrich_cache import ClassifyCache
+from enrich_core import ENRICH_CONCURRENCY, classify_args, enrich_stream, to_json_line
+from mermaid.utils.json_helper import load_json_file
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 INPUT_FILE = "output/icons_rag.json"
 SUCCESS_FILE = "output/test_enriched_icons.json"
 ERROR_FILE = "output/test_error_icons.json"
-BATCH_SIZE = 2 # Small batch for testing
-
-async def enrich_batch(batch: List[Dict]) -> List[Dict]:
-    """Process a batch of icons concurrently"""
-    tasks = []
-    for icon in batch:
-        tasks.append(aclassify_icon(
-            icon.get('provider', ''),
-            icon.get('slug', ''),
-            icon.get('display_name', '')
-        ))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    processed_results = []
-    for icon, result in zip(batch, results):
-        if isinstance(result, Exception):
-            processed_results.append({"icon": icon, "error": str(result), "status": "failed"})
-        elif "error" in result:
-            processed_results.append({"icon": icon, "error": result["error"], "status": "failed"})
-        else:
-            enriched_icon = icon.copy()
-            enriched_icon.update(result)
-            processed_results.append({"icon": enriched_icon, "status": "success"})
-            
-    return processed_results
+# Append-only checkpoints (one JSON object per line), flushed every CHECKPOINT_FLUSH_EVERY records.
+# The error checkpoint is truncated per run: failed icons are retried, so only this run's failures belong in it
+SUCCESS_NDJSON = SUCCESS_FILE.replace(".json", ".ndjson")
+ERROR_NDJSON = ERROR_FILE.replace(".json", ".ndjson")
+CHECKPOINT_FLUSH_EVERY = 16
+# Fields with a handful of distinct values repeated across the whole catalog
+LOW_CARDINALITY_FIELDS = ("provider", "shape_type", "color_theme", "icon_position")
+
+def dump_json(obj, path: str) -> None:
+    """Write obj as 2-space indented JSON, with orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2)
+
+def intern_fields(icons: List[Dict]) -> None:
+    """Share one str object per distinct low-cardinality value instead of one per icon"""
+    for icon in icons:
+        for field in LOW_CARDINALITY_FIELDS:
+            value = icon.get(field)
+            if isinstance(value, str):
+                icon[field] = sys.intern(value)
+
+def done_key(icon: Dict) -> Tuple[str, str]:
+    """Identity used to recognise an already-enriched icon on restart"""
+    return icon.get("provider"), icon.get("slug")
+
+def load_done() -> Dict[Tuple[str, str], Dict]:
+    """Previously enriched icons from the consolidated file and the newer NDJSON checkpoint"""
+    done = {}
+    if os.path.exists(SUCCESS_FILE):
+        for icon in load_json_file(SUCCESS_FILE):
+            done[done_key(icon)] = icon
+    if os.path.exists(SUCCESS_NDJSON):
+        with open(SUCCESS_NDJSON, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    icon = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial last line from an interrupted run
+                    continue
+                done[done_key(icon)] = icon
+    return done
 
 async def main():
     if not os.path.exists(INPUT_FILE):
@@ -42,40 +73,66 @@ async def main():
         return
 
     print(f"Reading {INPUT_FILE}...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        icons = json.load(f)
+    icons = load_json_file(INPUT_FILE)
+    intern_fields(icons)
 
     # PROCESS ONLY 2 ICONS FOR TESTING
     icons = icons[:2] 
 
+    # Resume: keep earlier successes and only dispatch icons that still need enrichment
+    done = load_done()
+    if done:
+        before = len(icons)
+        icons = [icon for icon in icons if done_key(icon) not in done]
+        print(f"Skipping {before - len(icons)} already enriched icons")
+
     print(f"Total icons to process: {len(icons)}")
+    # Extract the classifier arguments once, up front
+    triples = [classify_args(icon) for icon in icons]
     
-    success_icons = []
+    success_icons = list(done.values())
     error_icons = []
     
-    for i in range(0, len(icons), BATCH_SIZE):
-        batch = icons[i:i + BATCH_SIZE]
-        print(f"Processing test batch {i//BATCH_SIZE + 1}...")
-        
-        results = await enrich_batch(batch)
-        
-        for res in results:
-            if res["status"] == "success":
-                success_icons.append(res["icon"])
-            else:
-                failed_item = res["icon"].copy()
-                failed_item["enrichment_error"] = res["error"]
-                error_icons.append(failed_item)
-
-        with open(SUCCESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(success_icons, f, indent=2)
-        
-        with open(ERROR_FILE, 'w', encoding='utf-8') as f:
-            json.dump(error_icons, f, indent=2)
+    print(f"Processing {len(icons)} icons with up to {ENRICH_CONCURRENCY} concurrent requests...")
+    cache = ClassifyCache()
+    stream = enrich_stream(icons, triples, cache=cache)
+    try:
+        with open(SUCCESS_NDJSON, 'a', encoding='utf-8', buffering=1 << 16) as f_ok, \
+             open(ERROR_NDJSON, 'w', encoding='utf-8', buffering=1 << 16) as f_err:
+            # Bind the per-record callables once; the loop body runs for every icon
+            ok, bad = success_icons.append, error_icons.append
+            write_ok, write_err = f_ok.write, f_err.write
+            processed = 0
+            async for res in stream:
+                icon = res["icon"]
+                if res["status"] == "success":
+                    ok(icon)
+                    write_ok(to_json_line(icon))
+                else:
+                    failed_item = {**icon, "enrichment_error": res["error"]}
+                    bad(failed_item)
+                    write_err(to_json_line(failed_item))
+
+                # Each record is appended once; flush periodically rather than rewriting the whole list
+                processed += 1
+                if processed % CHECKPOINT_FLUSH_EVERY == 0:
+                    f_ok.flush()
+                    f_err.flush()
+    finally:
+        # Cancels any workers still in flight if the loop above raised
+        await stream.aclose()
+        cache.close()
+
+    # Consolidated JSON arrays, written once at the end
+    dump_json(success_icons, SUCCESS_FILE)
+    dump_json(error_icons, ERROR_FILE)
 
     print("\nTest processing complete!")
     print(f"Successfully enriched: {len(success_icons)}")
     print(f"Failed: {len(error_icons)}")
 
 if __name__ == "__main__":
+    # uvloop's libuv event loop dispatches socket readiness faster for many concurrent LLM calls
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Exercise POST /api/rag/upload/ndjson with identity, gzip and zstd request bodies.
+
+Runs in-process against qd_emb.app with a recording pipeline in place of the
+Qdrant-backed one, so no Qdrant or embedding server is needed.
+"""
+import json
+import zlib
+from fastapi.testclient import TestClient
+import qd_emb
+
+class RecordingPipeline:
+    """Collects indexed icons instead of embedding them"""
+
+    def __init__(self):
+        self.icons = []
+        self.saves = 0
+
+    async def create_collection(self):
+        pass
+
+    async def index_icons(self, icons, save=True):
+        self.icons.extend(icons)
+        return len(icons)
+
+    async def save_to_disk(self):
+        self.saves += 1
+
+ICONS = [{"slug": f"icon-{i}", "provider": "Test", "popularity": i} for i in range(600)]
+BODY = b"".join(json.dumps(icon).encode() + b"\n" for icon in ICONS)
+
+def gzip_body(body: bytes) -> bytes:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+def post(body: bytes, encoding: str = None) -> RecordingPipeline:
+    pipeline = RecordingPipeline()
+    qd_emb.rag = pipeline
+    headers = {"Content-Type": "application/x-ndjson"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    response = TestClient(qd_emb.app).post("/api/rag/upload/ndjson", content=body, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["count"] == len(ICONS), response.json()
+    assert pipeline.icons == ICONS
+    assert pipeline.saves == 1
+    return pipeline
+
+def test_identity_upload():
+    post(BODY)
+
+def test_gzip_upload():
+    post(gzip_body(BODY), "gzip")
+
+def test_zstd_upload():
+    if qd_emb.zstandard is None:
+        print("⚠️  zstandard not installed, skipping zstd upload")
+        return
+    post(qd_emb.zstandard.ZstdCompressor().compress(BODY), "zstd")
+
+if __name__ == "__main__":
+    test_identity_upload()
+    print("✓ identity NDJSON upload")
+    test_gzip_upload()
+    print("✓ gzip NDJSON upload")
+    test_zstd_upload()
+    print("✓ zstd NDJSON upload")
@@ -1,26 +1,117 @@
+import importlib.util
 import json
+import mmap
+import os
+import sys
+import zlib
+from itertools import groupby, islice
+from operator import attrgetter
+from typing import List, Optional, Union
 import requests
-from collections import defaultdict
 
-with open('output/icons_rag.json', 'r') as f:
-    icons = json.load(f)
+from mermaid.utils.json_helper import load_json_file
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# HTTP/2 needs the optional h2 package alongside httpx
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Fields with a handful of distinct values repeated across the whole catalog
+LOW_CARDINALITY_FIELDS = ("provider", "shape_type", "color_theme", "icon_position")
+
+if msgspec is not None:
+    class Icon(msgspec.Struct, omit_defaults=True):
+        """One catalog record from icons_rag.json; absent fields stay absent when re-encoded."""
+        id: Optional[str] = None
+        slug: Optional[str] = None
+        iconify_id: Optional[str] = None
+        provider: Optional[str] = None
+        url: Optional[str] = None
+        display_name: Optional[str] = None
+        semantic_profile: Optional[str] = None
+        technical_intent: Optional[str] = None
+        description: Optional[str] = None
+        aliases: Union[List[str], str, None] = None
+        tags: Union[List[str], str, None] = None
+        category: Optional[str] = None
+        shape_type: Optional[str] = None
+        default_width: Optional[int] = None
+        is_container: Optional[bool] = None
+        icon_position: Optional[str] = None
+        color_theme: Optional[str] = None
+        brand_color: Optional[str] = None
+        popularity: Optional[Union[int, float]] = None
+        last_scraped: Optional[str] = None
+
+    # Typed decode straight into slot-based structs, reading the file through a read-only
+    # mmap so there is no intermediate bytes copy (decoded strings do not reference the map)
+    with open('output/icons_rag.json', 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                icons = msgspec.json.decode(view, type=List[Icon])
+    provider_of = attrgetter("provider")
+    encode_icon = msgspec.json.encode
+
+    # Share one str object per distinct value of the low-cardinality fields
+    for icon in icons:
+        for field in LOW_CARDINALITY_FIELDS:
+            value = getattr(icon, field)
+            if isinstance(value, str):
+                setattr(icon, field, sys.intern(value))
+else:
+    # orjson over a read-only mmap for large files, stdlib json without orjson
+    icons = load_json_file('output/icons_rag.json')
+    if orjson is not None:
+        encode_icon = orjson.dumps
+    else:
+        encode_icon = lambda icon: json.dumps(icon).encode()
+    provider_of = lambda icon: icon.get("provider")
+
+    # Share one str object per distinct value of the low-cardinality fields
+    for icon in icons:
+        for field in LOW_CARDINALITY_FIELDS:
+            value = icon.get(field)
+            if isinstance(value, str):
+                icon[field] = sys.intern(value)
 
 # ✅ providers to keep
-ALLOWED_PROVIDERS = {
+ALLOWED_PROVIDERS = frozenset({
     "Amazon Web Services",
     "Google Cloud Platform",
     "Infrastructure",
     "Microsoft Azure",
     "Technology",
-}
-
-# 1. Group icons by provider (filtered)
-provider_map = defaultdict(list)
+})
+# Icons kept per provider
+PER_PROVIDER_CAP = 40
 
-for icon in icons:
-    provider = icon.get("provider")
-    if provider in ALLOWED_PROVIDERS:
-        provider_map[provider].append(icon)
+# 1. Sort once by provider, then take the first PER_PROVIDER_CAP icons of each allowed
+# provider's run. The sort is stable, so every provider keeps its catalog order, and the
+# producer already writes icons_rag.json grouped by provider, so timsort finishes in ~one pass.
+icons.sort(key=lambda icon: provider_of(icon) or "")
+provider_map = {
+    provider: list(islice(group, PER_PROVIDER_CAP))
+    for provider, group in groupby(icons, key=provider_of)
+    if provider in ALLOWED_PROVIDERS
+}
 
 # 2. Get set of providers and print them
 providers = set(provider_map.keys())
@@ -28,18 +119,56 @@ print(f"Found {len(providers)} providers:")
 for p in sorted(providers):
     print("-", p)
 
-# 3. Take top 50 icons from each provider
-filtered_icons = []
-for provider, items in provider_map.items():
-    filtered_icons.extend(items[:40])
+# 3. Flatten the capped per-provider lists
+filtered_icons = [icon for items in provider_map.values() for icon in items]
 
 print(f"\nTotal icons selected for upload: {len(filtered_icons)}")
 
-# 4. Upload
-response = requests.post(
-    "http://localhost:8001/api/rag/upload",
-    json={"icons": filtered_icons}
-)
+# 4. Stream the selection as NDJSON (one icon per line). The server parses and indexes
+# the lines as they arrive, so neither side holds the whole upload at once.
+UPLOAD_URL = "http://localhost:8001/api/rag/upload/ndjson"
+
+# Request body compression: "gzip" (default), "zstd" (needs zstandard here and on the server) or "identity"
+UPLOAD_ENCODING = os.getenv("UPLOAD_ENCODING", "gzip")
+if UPLOAD_ENCODING == "zstd" and zstandard is None:
+    UPLOAD_ENCODING = "gzip"
+
+def ndjson_lines(icons):
+    for icon in icons:
+        yield encode_icon(icon) + b"\n"
+
+def compressed(chunks):
+    """Compress a stream of byte chunks incrementally with UPLOAD_ENCODING"""
+    if UPLOAD_ENCODING == "zstd":
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    elif UPLOAD_ENCODING == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    else:
+        yield from chunks
+        return
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+UPLOAD_HEADERS = {"Content-Type": "application/x-ndjson"}
+if UPLOAD_ENCODING in ("gzip", "zstd"):
+    UPLOAD_HEADERS["Content-Encoding"] = UPLOAD_ENCODING
+
+# Generator bodies are sent with chunked transfer encoding by both clients
+if httpx is not None:
+    client = httpx.Client(
+        http2=HTTP2,
+        timeout=60.0,
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+    )
+    post_stream = lambda body: client.post(UPLOAD_URL, content=body, headers=UPLOAD_HEADERS)
+else:
+    client = requests.Session()
+    post_stream = lambda body: client.post(UPLOAD_URL, data=body, headers=UPLOAD_HEADERS)
 
-print(response.status_code)
-print(response.json())
+with client:
+    response = post_stream(compressed(ndjson_lines(filtered_icons)))
+    print(response.status_code)
+    print(response.json())
@@ -1,8 +1,26 @@
+import asyncio
 import requests
 import json
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 URL = "http://localhost:8001/api/rag"
 
+# requests.Session is not documented as thread-safe, so each worker thread gets its own
+_local = threading.local()
+
+def get_session() -> requests.Session:
+    """This thread's keep-alive session; idempotent GETs retry with backoff on gateway errors"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.1, status_forcelist=[502, 503, 504]),
+        ))
+        _local.session = session
+    return session
+
 # 1. Test Data - S3 and CloudHSM
 test_icons = [
   {
@@ -188,18 +206,30 @@ test_icons = [
 ]
 
 
-def verify():
+def upload(icons: list) -> requests.Response:
+    return get_session().post(f"{URL}/upload", json={"icons": icons})
+
+def search(q: str, top_k: int = 1) -> dict:
+    return get_session().get(f"{URL}/search", params={"q": q, "top_k": top_k}).json()
+
+async def verify():
     print("🚀 Starting Verification...")
     
     # Upload
     print("\n📤 Uploading icons...")
-    resp = requests.post(f"{URL}/upload", json={"icons": test_icons})
+    resp = await asyncio.to_thread(upload, test_icons)
     print(f"Status: {resp.status_code}, Response: {resp.json()}")
     
+    # Both searches are independent; run them concurrently, each thread on its own session
+    print("\n🔍 Searching for 'connector light' and 'social media'...")
+    connector_data, social_data = await asyncio.gather(
+        asyncio.to_thread(search, "connector light"),
+        asyncio.to_thread(search, "social media"),
+    )
+    
     # Search for CloudHSM
-    print("\n🔍 Searching for 'connector light'...")
-    resp = requests.get(f"{URL}/search", params={"q": "connector light", "top_k": 1})
-    data = resp.json()
+    print("\n🔍 Results for 'connector light':")
+    data = connector_data
     if data["results"]:
         hit = data["results"][0]
         print(f"✅ Found: {hit['display_name']} (Score: {hit['score']}, Search Type: {hit['search_type']})")
@@ -214,9 +244,8 @@ def verify():
         print("❌ 'connector light' not found!")
 
     # Search for S3
-    print("\n🔍 Searching for 'social media'...")
-    resp = requests.get(f"{URL}/search", params={"q": "social media", "top_k": 1})
-    data = resp.json()
+    print("\n🔍 Results for 'social media':")
+    data = social_data
     if data["results"]:
         hit = data["results"][0]
         print(f"✅ Found: {hit['display_name']} (Score: {hit['score']}, Search Type: {hit['search_type']})")
@@ -224,4 +253,4 @@ def verify():
         print("❌ 'social media' not found!")
 
 if __name__ == "__main__":
-    verify()
+    asyncio.run(verify())